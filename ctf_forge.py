@@ -15,14 +15,19 @@ for EnIGMA directly in each task folder.
 
 import json
 import argparse
+import errno
 import os
 import shutil
 import subprocess
 from pathlib import Path
 from typing import Dict, List, Optional, Set, Any
+from dataclasses import dataclass
 import re
 import threading
 import concurrent.futures
+import functools
+import multiprocessing
+from collections import Counter
 from tqdm import tqdm
 import yaml
 import stat
@@ -51,6 +56,10 @@ from forge.files import (
     read_init_content,
     get_file_type_info,
     get_task_files_with_info,
+    list_task_files,
+    MANIFEST_FILENAME,
+    is_task_manifest_current,
+    write_task_manifest,
 )
 from forge.validators import (
     validate_dockerfile,
@@ -108,17 +117,21 @@ def call_model_for_server_detection(task_data: Dict, model: str = "deepseek-v3-0
     task_path = task_data.get("task_path", "")
     description = task_data.get("description", "")
     
+    # One walk of the task directory serves the file list and the file info below
+    listing = list_task_files(task_path)
+    task_files = get_task_files(task_path, listing)
+    
     # Get Python scripts context
-    python_context = get_python_scripts_context(task_path, get_task_files(task_path))
+    python_context = get_python_scripts_context(task_path, task_files)
     
     prompt = SERVER_DETECTION_PROMPT.format(
         task_name=task_name,
         category=task_data.get("category", ""),
         description=description,
         rehost_content=task_data.get("rehost_content", ""),
-        available_files_info=get_task_files_with_info(task_path),
+        available_files_info=get_task_files_with_info(task_path, listing),
         has_sha256_file=bool(find_sha256_file(task_path)),
-        file_analysis=get_enhanced_file_analysis(task_path, get_task_files(task_path))
+        file_analysis=get_enhanced_file_analysis(task_path, task_files)
     )
     
     # Add Python scripts context to the prompt
@@ -190,8 +203,8 @@ def find_check_file(task_path: str) -> Optional[str]:
     return _f(task_path)
 
 def cleanup_docker_files(task_output_dir: Path, verbose: bool = False) -> None:
-    """Remove existing challenge.json, Dockerfile, and docker-compose.yml files from task directory."""
-    docker_files = ["challenge.json", "Dockerfile", "docker-compose.yml"]
+    """Remove existing challenge.json, Dockerfile, docker-compose.yml and manifest files from task directory."""
+    docker_files = ["challenge.json", "Dockerfile", "docker-compose.yml", MANIFEST_FILENAME]
     
     for docker_file in docker_files:
         file_path = task_output_dir / docker_file
@@ -215,6 +228,35 @@ def cleanup_docker_files(task_output_dir: Path, verbose: bool = False) -> None:
                 if verbose:
                     print(f"{RED}Warning: Could not remove {file_path}: {e}{RESET}")
 
+@dataclass
+class TaskAnalysis:
+    """Filesystem facts about a task that can be gathered without calling the model."""
+    dockerfile_exists: bool
+    docker_compose_exists: bool
+    challenge_json_exists: bool
+    has_sha256_file: bool
+    has_check_file: bool
+    task_files: List[str]
+
+
+def analyze_task(task_data: Dict) -> Optional[TaskAnalysis]:
+    """Collect the file probes process_task needs, without calling the model."""
+    task_path = task_data.get("task_path", "")
+    if not task_path or not os.path.exists(task_path):
+        return None
+    
+    task_output_dir = Path(task_path)
+    
+    return TaskAnalysis(
+        dockerfile_exists=(task_output_dir / "Dockerfile").exists(),
+        docker_compose_exists=(task_output_dir / "docker-compose.yml").exists(),
+        challenge_json_exists=(task_output_dir / "challenge.json").exists(),
+        has_sha256_file=find_sha256_file(task_path) is not None,
+        has_check_file=find_check_file(task_path) is not None,
+        task_files=get_task_files(task_path),
+    )
+
+
 def process_task(task_data: Dict, create_docker_compose: bool = True, model: str = "deepseek-v3-0324", max_retries: int = 10, overwrite: bool = False, verbose: bool = False) -> bool:
     """Process a single task and generate challenge.json and optional docker-compose.yml directly in the task folder."""
     
@@ -228,12 +270,28 @@ def process_task(task_data: Dict, create_docker_compose: bool = True, model: str
             print(f"{RED}Task path does not exist: {task_path}{RESET}")
         return False
     
+    # A current manifest means a previous run finished this task and nothing changed since
+    if not overwrite and is_task_manifest_current(task_path):
+        if verbose:
+            print(f"{YELLOW}Skipping up-to-date task (manifest unchanged): {task_name}{RESET}")
+        return True
+    
     task_output_dir = Path(task_path)  # Write directly to task folder
     
+    if overwrite:
+        if verbose:
+            print(f"{BLUE}Overwriting existing task: {task_name}{RESET}")
+        cleanup_docker_files(task_output_dir, verbose)
+    
+    # Probe the task files after any cleanup, so the listing no longer has removed files
+    analysis = analyze_task(task_data)
+    if analysis is None:
+        return False
+    
     # Check existing files
-    dockerfile_exists = (task_output_dir / "Dockerfile").exists()
-    docker_compose_exists = (task_output_dir / "docker-compose.yml").exists()
-    challenge_json_exists = (task_output_dir / "challenge.json").exists()
+    dockerfile_exists = analysis.dockerfile_exists
+    docker_compose_exists = analysis.docker_compose_exists
+    challenge_json_exists = analysis.challenge_json_exists
     
     # If not overwriting, check what needs to be generated
     if not overwrite:
@@ -270,19 +328,15 @@ def process_task(task_data: Dict, create_docker_compose: bool = True, model: str
         need_dockerfile = True
         need_docker_compose = True
         need_challenge_json = True
-        
-        if verbose:
-            print(f"{BLUE}Overwriting existing task: {task_name}{RESET}")
-        cleanup_docker_files(task_output_dir, verbose)
 
     try:
         # Step 1: Check if task has sha256 file
-        has_sha256_file = find_sha256_file(task_path) is not None
+        has_sha256_file = analysis.has_sha256_file
         if verbose:
             print(f"{BLUE}=== Has SHA256 file: {has_sha256_file} ==={RESET}")
         
         # Step 2: Get task files (excluding generated files)
-        task_files = get_task_files(task_path)
+        task_files = analysis.task_files
         
         if verbose:
             print(f"{BLUE}=== Task files ==={RESET}")
@@ -292,7 +346,7 @@ def process_task(task_data: Dict, create_docker_compose: bool = True, model: str
         # Step 3: Check if server is needed
         rehost_content = task_data.get("rehost_content", "")
         has_own_custom_flag = "own custom flag" in rehost_content.lower()
-        has_check_file = find_check_file(task_path) is not None
+        has_check_file = analysis.has_check_file
         
         category = task_data.get("category", "").lower() if task_data.get("category") else "misc"
         
@@ -449,6 +503,13 @@ def process_task(task_data: Dict, create_docker_compose: bool = True, model: str
             if verbose:
                 print(f"{BLUE}Using existing challenge.json for {task_name}{RESET}")
         
+        # Stamp the manifest only when every expected output is present
+        expected_outputs = ["challenge.json"]
+        if server_needed:
+            expected_outputs += ["Dockerfile", "docker-compose.yml"]
+        if all((task_output_dir / name).exists() for name in expected_outputs):
+            write_task_manifest(task_path, expected_outputs)
+        
         return True
         
     except Exception as e:
@@ -654,6 +715,51 @@ def generate_dockerfile_with_retries(task_data: Dict, available_files: List[str]
     return dockerfile_content, parsed_flag, True
 
 
+def process_single_task(task: Dict, create_docker_compose: bool, model: str, max_retries: int, overwrite: bool, verbose: bool) -> bool:
+    """Process a single task and return success status (module level so worker processes can run it)."""
+    task_name = task.get("task_name", "unknown")
+    ctf_name = task.get("ctf_name", "unknown")
+    
+    try:
+        success = process_task(task, create_docker_compose, model, max_retries, overwrite, verbose)
+        if verbose and success:
+            print(f"{GREEN}✓ Completed: {ctf_name}/{task_name}{RESET}")
+        elif verbose and not success:
+            print(f"{RED}✗ Failed: {ctf_name}/{task_name}{RESET}")
+        return success
+    except Exception as e:
+        if verbose:
+            print(f"{RED}✗ Error processing {ctf_name}/{task_name}: {e}{RESET}")
+        return False
+
+
+def _clone_tree(src: str, dst: str) -> None:
+    """
+    Recreate the directory tree at src under dst, hardlinking regular files.
+    Falls back to copying across filesystems. Linked files share data with the
+    template, so generated files must be written as new files, not modified in place.
+    """
+    os.mkdir(dst)
+    stack = [(src, dst)]
+    
+    while stack:
+        src_dir, dst_dir = stack.pop()
+        with os.scandir(src_dir) as entries:
+            for entry in entries:
+                dst_path = os.path.join(dst_dir, entry.name)
+                # Symlinks are followed, as shutil.copytree did by default
+                if entry.is_dir():
+                    os.mkdir(dst_path)
+                    stack.append((entry.path, dst_path))
+                else:
+                    try:
+                        os.link(entry.path, dst_path)
+                    except OSError as e:
+                        if e.errno not in (errno.EXDEV, errno.EPERM, errno.EMLINK):
+                            raise
+                        shutil.copy2(entry.path, dst_path)
+
+
 def main():
     parser = argparse.ArgumentParser(description="Generate challenge.json and docker-compose.yml files directly in CTF challenge folders from ctf-archive.")
     parser.add_argument('--path', default='ctf-archive', 
@@ -686,8 +792,16 @@ def main():
     # Define the working directory
     ctf_archive_path = 'ctf-archive'
     
+    # When the template already is the working directory, work on it in place:
+    # removing and re-cloning it would delete the template itself
+    in_place = os.path.realpath(args.path) == os.path.realpath(ctf_archive_path)
+    if in_place:
+        ctf_archive_path = args.path
+        if args.verbose:
+            print(f"{BLUE}Template is {ctf_archive_path}; processing it in place{RESET}")
+    
     # Handle template copying and overwrite logic
-    if args.overwrite:
+    if args.overwrite and not in_place:
         # Remove existing ctf-archive directory if it exists
         if os.path.exists(ctf_archive_path):
             if args.verbose:
@@ -695,18 +809,18 @@ def main():
             shutil.rmtree(ctf_archive_path)
     
     # Copy template to ctf-archive if it doesn't exist or if overwrite is specified
-    if not os.path.exists(ctf_archive_path) or args.overwrite:
+    if not in_place and (not os.path.exists(ctf_archive_path) or args.overwrite):
         if not os.path.exists(args.path):
             print(f"{RED}Template directory not found: {args.path}{RESET}")
             return
         
         if args.verbose:
-            print(f"{BLUE}Copying {args.path} to {ctf_archive_path}...{RESET}")
+            print(f"{BLUE}Linking {args.path} into {ctf_archive_path}...{RESET}")
         
         try:
-            shutil.copytree(args.path, ctf_archive_path)
+            _clone_tree(args.path, ctf_archive_path)
             if args.verbose:
-                print(f"{GREEN}Successfully copied template to {ctf_archive_path}{RESET}")
+                print(f"{GREEN}Successfully cloned template to {ctf_archive_path}{RESET}")
         except Exception as e:
             print(f"{RED}Failed to copy template: {e}{RESET}")
             return
@@ -730,9 +844,19 @@ def main():
     
     # Convert directories to task data
     tasks = []
-    for task_dir in task_directories:
-        task_data = extract_task_info(task_dir)
+    if args.workers > 1 and not args.demo:
+        # Task parsing is mostly YAML/Markdown reading, so spread it over processes
+        with concurrent.futures.ProcessPoolExecutor(max_workers=args.workers) as executor:
+            parsed_tasks = list(executor.map(extract_task_info, task_directories, chunksize=64))
+    else:
+        parsed_tasks = [extract_task_info(task_dir) for task_dir in task_directories]
+    
+    for task_dir, task_data in zip(task_directories, parsed_tasks):
         if task_data:
+            # Lowercased copies for the filters below (not part of any generated output)
+            task_data["_ctf_name_lc"] = task_data.get("ctf_name", "").lower()
+            task_data["_category_lc"] = (task_data.get("category") or "").lower()
+            task_data["_task_tags_lc"] = [tag.lower() for tag in task_data.get("task_tags", [])]
             tasks.append(task_data)
         else:
             if args.verbose:
@@ -753,28 +877,32 @@ def main():
         print(f"{BLUE}Selected task: {tasks[0]['ctf_name']}/{tasks[0]['task_name']}{RESET}")
     
     # Apply filters (only if not in demo mode)
-    if not args.demo:
-        filtered_tasks = tasks
+    if not args.demo and (args.filter_ctf or args.filter_category or args.max_tasks):
+        ctf_needle = args.filter_ctf.lower() if args.filter_ctf else None
+        category_needle = args.filter_category.lower() if args.filter_category else None
+        limit = args.max_tasks or len(tasks)
         
-        if args.filter_ctf:
-            filtered_tasks = [t for t in filtered_tasks if args.filter_ctf.lower() in t.get("ctf_name", "").lower()]
-            if args.verbose:
-                print(f"{YELLOW}Filtered to {len(filtered_tasks)} tasks matching CTF: {args.filter_ctf}{RESET}")
-        
-        if args.filter_category:
-            filter_lower = args.filter_category.lower()
-            filtered_tasks = [t for t in filtered_tasks 
-                             if ((t.get("category") or "").lower() == filter_lower or
-                                 filter_lower in (t.get("category") or "").lower() or
-                                 any(filter_lower in tag.lower() 
-                                     for tag in t.get("task_tags", [])))]
-            if args.verbose:
-                print(f"{YELLOW}Filtered to {len(filtered_tasks)} tasks matching category: {args.filter_category}{RESET}")
+        # Single pass over the tasks, stopping as soon as max_tasks are selected
+        filtered_tasks = []
+        for t in tasks:
+            if ctf_needle and ctf_needle not in t["_ctf_name_lc"]:
+                continue
+            if category_needle and not (category_needle in t["_category_lc"] or
+                                        any(category_needle in tag for tag in t["_task_tags_lc"])):
+                continue
+            filtered_tasks.append(t)
+            if len(filtered_tasks) >= limit:
+                break
         
-        if args.max_tasks:
-            filtered_tasks = filtered_tasks[:args.max_tasks]
-            if args.verbose:
-                print(f"{YELLOW}Limited to {len(filtered_tasks)} tasks{RESET}")
+        if args.verbose:
+            filters = []
+            if args.filter_ctf:
+                filters.append(f"CTF: {args.filter_ctf}")
+            if args.filter_category:
+                filters.append(f"category: {args.filter_category}")
+            if args.max_tasks:
+                filters.append(f"limit: {args.max_tasks}")
+            print(f"{YELLOW}Filtered to {len(filtered_tasks)} tasks ({', '.join(filters)}){RESET}")
         
         tasks = filtered_tasks
     
@@ -786,12 +914,8 @@ def main():
         
         for task in tasks:
             task_path = task.get("task_path", "")
-            if task_path:
-                task_dir = Path(task_path)
-                if (task_dir / "challenge.json").exists():
-                    existing_tasks.append(task)
-                else:
-                    remaining_tasks.append(task)
+            if task_path and os.path.lexists(os.path.join(task_path, "challenge.json")):
+                existing_tasks.append(task)
             else:
                 remaining_tasks.append(task)
         
@@ -810,23 +934,6 @@ def main():
     successful = 0
     failed = 0
     
-    def process_single_task(task):
-        """Process a single task and return success status."""
-        task_name = task.get("task_name", "unknown")
-        ctf_name = task.get("ctf_name", "unknown")
-        
-        try:
-            success = process_task(task, not args.no_docker_compose, args.model, args.max_retries, args.overwrite, args.verbose)
-            if args.verbose and success:
-                print(f"{GREEN}✓ Completed: {ctf_name}/{task_name}{RESET}")
-            elif args.verbose and not success:
-                print(f"{RED}✗ Failed: {ctf_name}/{task_name}{RESET}")
-            return success
-        except Exception as e:
-            if args.verbose:
-                print(f"{RED}✗ Error processing {ctf_name}/{task_name}: {e}{RESET}")
-            return False
-    
     if args.workers == 1 or args.demo:
         # Sequential processing (always used in demo mode)
         for i, task in enumerate(tasks, 1):
@@ -837,7 +944,7 @@ def main():
                 print(f"\n{BLUE}[{i}/{len(tasks)}] Processing: {ctf_name}/{task_name}{RESET}")
                 print(f"{BLUE}Task path: {task.get('task_path', 'unknown')}{RESET}")
             
-            if process_single_task(task):
+            if process_single_task(task, not args.no_docker_compose, args.model, args.max_retries, args.overwrite, args.verbose):
                 successful += 1
             else:
                 failed += 1
@@ -846,19 +953,24 @@ def main():
         if args.verbose:
             print(f"{BLUE}Processing {len(tasks)} tasks with {args.workers} workers...{RESET}")
 
-        with concurrent.futures.ThreadPoolExecutor(max_workers=args.workers) as executor:
-            with tqdm(total=len(tasks), desc="Processing tasks") as pbar:
-                futures = []
-                for task in tasks:
-                    futures.append(executor.submit(process_single_task, task))
-                
-                for future in concurrent.futures.as_completed(futures):
-                    result = future.result()
-                    if result:
-                        successful += 1
-                    else:
-                        failed += 1
-                    pbar.update(1)
+        # Worker processes sidestep the GIL for the file analysis and response parsing
+        # done around each model call; they are forked before any client is used
+        with concurrent.futures.ProcessPoolExecutor(max_workers=args.workers, mp_context=multiprocessing.get_context('fork')) as executor:
+            worker = functools.partial(
+                process_single_task,
+                create_docker_compose=not args.no_docker_compose,
+                model=args.model,
+                max_retries=args.max_retries,
+                overwrite=args.overwrite,
+                verbose=args.verbose,
+            )
+            # Tasks are dispatched in chunks, and results come back in task order
+            results = executor.map(worker, tasks, chunksize=max(1, len(tasks) // (args.workers * 4)))
+            
+            # Progress advances from this thread only, as results arrive
+            outcomes = Counter(tqdm(results, total=len(tasks), desc="Processing tasks"))
+            successful += outcomes[True]
+            failed += outcomes[False]
     
     # Summary
     if args.verbose:
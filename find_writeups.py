@@ -5,25 +5,40 @@
 # SPDX-License-Identifier: CC-BY-NC-4.0
 
 import json
+import mmap
+import os
 import re
+import sys
 from collections import defaultdict, Counter
 from difflib import SequenceMatcher
 import argparse
 from pathlib import Path
 import multiprocessing as mp
-from functools import partial
+
+try:
+    import orjson  # optional faster JSON parser/serializer
+except ImportError:
+    orjson = None
+
+# Both accept bytes; orjson.JSONDecodeError subclasses json.JSONDecodeError
+_json_loads = orjson.loads if orjson is not None else json.loads
+
+_NORM_RE = re.compile(r'[^a-zA-Z0-9]')
+_YEAR_RE = re.compile(r'(?:19|20)\d{2}')
+_SUFFIX_RE = re.compile(r'(ctf|20\d{2}|19\d{2})$')
+_CHAR_BITS = {c: 1 << i for i, c in enumerate('0123456789abcdefghijklmnopqrstuvwxyz')}
 
 def normalize_string(s):
     """Normalize string for fuzzy matching by removing special characters and converting to lowercase"""
     # Remove special characters and convert to lowercase
-    normalized = re.sub(r'[^a-zA-Z0-9]', '', s.lower())
-    return normalized
+    normalized = _NORM_RE.sub('', s.lower())
+    # Interned so the many writeups/tasks sharing a name share one string object
+    return sys.intern(normalized)
 
 def extract_year(competition_name):
     """Extract year from competition name"""
-    import re
     # Look for 4-digit year pattern
-    year_match = re.search(r'(19|20)\d{2}', competition_name)
+    year_match = _YEAR_RE.search(competition_name)
     if year_match:
         return year_match.group(0)
     return None
@@ -56,8 +71,42 @@ def extract_competition_task_from_ctf_path(ctf_path):
     
     return competition, task
 
-def fast_similarity_score(s1, s2):
-    """Fast similarity score using simple character overlap"""
+def build_ctf_index(ctf_tasks):
+    """Precompute (ctf_key, path, competition, task, year) for every CTF task with a usable path"""
+    ctf_index = []
+    for ctf_key, ctf_data in ctf_tasks.items():
+        ctf_comp, ctf_task = extract_competition_task_from_ctf_path(ctf_data['path'])
+        
+        if not ctf_comp or not ctf_task:
+            continue
+        
+        ctf_index.append((ctf_key, ctf_data['path'], ctf_comp, ctf_task, extract_year(ctf_comp)))
+    
+    return ctf_index
+
+def build_ctf_buckets(ctf_index):
+    """
+    Group the CTF index by year, then by competition name, as {year: {comp: (comp_bitmap, entries)}}.
+    Each entry is (position in ctf_index, ctf_key, path, task, task_bitmap) so matching can keep archive order on ties.
+    """
+    ctf_buckets = {}
+    for position, (ctf_key, ctf_path, ctf_comp, ctf_task, ctf_year) in enumerate(ctf_index):
+        comps = ctf_buckets.setdefault(ctf_year, {})
+        if ctf_comp not in comps:
+            comps[ctf_comp] = (char_bitmap(ctf_comp), [])
+        comps[ctf_comp][1].append((position, ctf_key, ctf_path, ctf_task, char_bitmap(ctf_task)))
+    
+    return ctf_buckets
+
+def char_bitmap(s):
+    """Bitmap of the distinct characters in s: bits 0-35 for [0-9a-z], higher bits for anything else"""
+    bitmap = 0
+    for c in s:
+        bitmap |= _CHAR_BITS.get(c) or 1 << (36 + ord(c))
+    return bitmap
+
+def fast_similarity_score(s1, s2, bitmap1=None, bitmap2=None):
+    """Fast similarity score using simple character overlap (bitmaps may be precomputed with char_bitmap)"""
     if not s1 or not s2:
         return 0
     
@@ -76,17 +125,23 @@ def fast_similarity_score(s1, s2):
         return 0.7 + (len(shorter) / len(longer)) * 0.3
     
     # Character overlap scoring
-    set1, set2 = set(s1), set(s2)
-    intersection = len(set1 & set2)
-    union = len(set1 | set2)
+    if bitmap1 is None:
+        bitmap1 = char_bitmap(s1)
+    if bitmap2 is None:
+        bitmap2 = char_bitmap(s2)
+    intersection = (bitmap1 & bitmap2).bit_count()
+    union = (bitmap1 | bitmap2).bit_count()
     
     if union == 0:
         return 0
     
     return intersection / union
 
-def enhanced_similarity_score(s1, s2):
-    """Enhanced similarity score that handles common CTF naming patterns"""
+def enhanced_similarity_score(s1, s2, min_score=0.0, bitmap1=None, bitmap2=None):
+    """
+    Enhanced similarity score that handles common CTF naming patterns.
+    Scores that provably cannot reach min_score are returned as 0.0 without being computed.
+    """
     if not s1 or not s2:
         return 0
     
@@ -106,14 +161,19 @@ def enhanced_similarity_score(s1, s2):
     # For competition names, try removing common suffixes/prefixes
     if len(s1) > 4 and len(s2) > 4:
         # Remove common patterns like "ctf", year suffixes, etc.
-        clean1 = re.sub(r'(ctf|20\d{2}|19\d{2})$', '', s1)
-        clean2 = re.sub(r'(ctf|20\d{2}|19\d{2})$', '', s2)
+        clean1 = _SUFFIX_RE.sub('', s1)
+        clean2 = _SUFFIX_RE.sub('', s2)
         
         if clean1 and clean2 and (clean1 == clean2 or clean1 in clean2 or clean2 in clean1):
             return 0.95
     
+    # The result is either the overlap score (<= 0.3) or a SequenceMatcher ratio,
+    # which is at most 2*len(shorter) / (len(shorter) + len(longer))
+    if min_score > 0.3 and 2 * len(shorter) / (len(shorter) + len(longer)) < min_score:
+        return 0.0
+    
     # Use fast similarity for initial screening
-    fast_score = fast_similarity_score(s1, s2)
+    fast_score = fast_similarity_score(s1, s2, bitmap1, bitmap2)
     
     # Only use expensive SequenceMatcher for promising matches
     if fast_score > 0.3:
@@ -121,27 +181,19 @@ def enhanced_similarity_score(s1, s2):
     
     return fast_score
 
-def similarity_score(s1, s2):
+def similarity_score(s1, s2, min_score=0.0, bitmap1=None, bitmap2=None):
     """Calculate similarity score between two strings"""
-    return enhanced_similarity_score(s1, s2)
+    return enhanced_similarity_score(s1, s2, min_score, bitmap1, bitmap2)
 
-def find_best_match(writeup_comp, writeup_task, ctf_tasks, min_threshold=0.8):
-    """Find the best matching CTF task for a writeup"""
+def find_best_match(writeup_comp, writeup_task, ctf_index, min_threshold=0.8):
+    """Find the best matching CTF task for a writeup (ctf_index comes from build_ctf_index)"""
     best_match = None
     best_score = 0
     
     # Extract year from writeup competition name
     writeup_year = extract_year(writeup_comp)
     
-    for ctf_key, ctf_data in ctf_tasks.items():
-        ctf_comp, ctf_task = extract_competition_task_from_ctf_path(ctf_data['path'])
-        
-        if not ctf_comp or not ctf_task:
-            continue
-        
-        # Extract year from CTF competition name
-        ctf_year = extract_year(ctf_comp)
-        
+    for ctf_key, ctf_path, ctf_comp, ctf_task, ctf_year in ctf_index:
         # Skip if years don't match (strict year matching)
         if writeup_year and ctf_year and writeup_year != ctf_year:
             continue
@@ -164,7 +216,7 @@ def find_best_match(writeup_comp, writeup_task, ctf_tasks, min_threshold=0.8):
             best_score = combined_score
             best_match = {
                 'ctf_key': ctf_key,
-                'ctf_path': ctf_data['path'],
+                'ctf_path': ctf_path,
                 'score': combined_score,
                 'comp_score': comp_score,
                 'task_score': task_score,
@@ -174,10 +226,11 @@ def find_best_match(writeup_comp, writeup_task, ctf_tasks, min_threshold=0.8):
     
     return best_match
 
-def find_best_match_verbose(writeup_comp, writeup_task, ctf_tasks, min_threshold=0.8, verbose=False):
-    """Find the best matching CTF task for a writeup with verbose logging"""
+def find_best_match_verbose(writeup_comp, writeup_task, ctf_buckets, min_threshold=0.8, verbose=False):
+    """Find the best matching CTF task for a writeup with verbose logging (ctf_buckets comes from build_ctf_buckets)"""
     best_match = None
     best_score = 0
+    best_position = None
     year_mismatches = 0
     competition_mismatches = 0
     task_mismatches = 0
@@ -185,55 +238,72 @@ def find_best_match_verbose(writeup_comp, writeup_task, ctf_tasks, min_threshold
     # Extract year from writeup competition name
     writeup_year = extract_year(writeup_comp)
     
-    for ctf_key, ctf_data in ctf_tasks.items():
-        ctf_comp, ctf_task = extract_competition_task_from_ctf_path(ctf_data['path'])
-        
-        if not ctf_comp or not ctf_task:
-            continue
-        
-        # Extract year from CTF competition name
-        ctf_year = extract_year(ctf_comp)
-        
-        # Skip if years don't match (strict year matching)
-        if writeup_year and ctf_year and writeup_year != ctf_year:
-            year_mismatches += 1
-            continue
-        
-        # Quick rejection based on length difference
-        if abs(len(writeup_comp) - len(ctf_comp)) > max(len(writeup_comp), len(ctf_comp)) * 0.5:
-            comp_score = 0
-        else:
-            comp_score = similarity_score(writeup_comp, ctf_comp)
-        
-        # Very strict competition name matching - require high competition similarity
-        if comp_score < 0.85:  # Require at least 85% similarity for competition names
-            competition_mismatches += 1
-            continue
-        
-        if abs(len(writeup_task) - len(ctf_task)) > max(len(writeup_task), len(ctf_task)) * 0.5:
-            task_score = 0
-        else:
-            task_score = similarity_score(writeup_task, ctf_task)
-        
-        # Strict task name matching - require minimum task similarity
-        if task_score < 0.8:  # Require at least 80% similarity for task names
-            task_mismatches += 1
-            continue
-        
-        # Combined score (heavily weighted towards competition name)
-        combined_score = (comp_score * 0.8) + (task_score * 0.2)
-        
-        if combined_score > best_score and combined_score >= min_threshold:
-            best_score = combined_score
-            best_match = {
-                'ctf_key': ctf_key,
-                'ctf_path': ctf_data['path'],
-                'score': combined_score,
-                'comp_score': comp_score,
-                'task_score': task_score,
-                'writeup_year': writeup_year,
-                'ctf_year': ctf_year
-            }
+    # Character bitmaps of the writeup side are shared by every comparison below
+    writeup_comp_bitmap = char_bitmap(writeup_comp)
+    writeup_task_bitmap = char_bitmap(writeup_task)
+    writeup_comp_len = len(writeup_comp)
+    writeup_task_len = len(writeup_task)
+    
+    # Skip if years don't match (strict year matching); tasks without a year always qualify
+    if writeup_year:
+        candidate_years = [year for year in (writeup_year, None) if year in ctf_buckets]
+        year_mismatches = sum(
+            len(entries)
+            for year, comps in ctf_buckets.items() if year not in (writeup_year, None)
+            for _, entries in comps.values()
+        )
+    else:
+        candidate_years = list(ctf_buckets)
+    
+    for ctf_year in candidate_years:
+        for ctf_comp, (ctf_comp_bitmap, entries) in ctf_buckets[ctf_year].items():
+            # The competition score is shared by every task of this competition.
+            # Quick rejection based on length difference (a score of 0 can never pass)
+            ctf_comp_len = len(ctf_comp)
+            if abs(writeup_comp_len - ctf_comp_len) * 2 > max(writeup_comp_len, ctf_comp_len):
+                competition_mismatches += len(entries)
+                continue
+            
+            comp_score = similarity_score(writeup_comp, ctf_comp, 0.85, writeup_comp_bitmap, ctf_comp_bitmap)
+            
+            # Very strict competition name matching - require high competition similarity
+            if comp_score < 0.85:  # Require at least 85% similarity for competition names
+                competition_mismatches += len(entries)
+                continue
+            
+            for position, ctf_key, ctf_path, ctf_task, ctf_task_bitmap in entries:
+                ctf_task_len = len(ctf_task)
+                if abs(writeup_task_len - ctf_task_len) * 2 > max(writeup_task_len, ctf_task_len):
+                    task_mismatches += 1
+                    continue
+                
+                task_score = similarity_score(writeup_task, ctf_task, 0.8, writeup_task_bitmap, ctf_task_bitmap)
+                
+                # Strict task name matching - require minimum task similarity
+                if task_score < 0.8:  # Require at least 80% similarity for task names
+                    task_mismatches += 1
+                    continue
+                
+                # Combined score (heavily weighted towards competition name)
+                combined_score = (comp_score * 0.8) + (task_score * 0.2)
+                
+                if combined_score < min_threshold or combined_score < best_score:
+                    continue
+                # On ties keep the task that comes first in the CTF archive
+                if combined_score == best_score and (best_match is None or position > best_position):
+                    continue
+                
+                best_score = combined_score
+                best_position = position
+                best_match = {
+                    'ctf_key': ctf_key,
+                    'ctf_path': ctf_path,
+                    'score': combined_score,
+                    'comp_score': comp_score,
+                    'task_score': task_score,
+                    'writeup_year': writeup_year,
+                    'ctf_year': ctf_year
+                }
     
     if verbose and (year_mismatches > 0 or competition_mismatches > 0 or task_mismatches > 0):
         print(f"  Year mismatches rejected: {year_mismatches} tasks")
@@ -242,21 +312,16 @@ def find_best_match_verbose(writeup_comp, writeup_task, ctf_tasks, min_threshold
     
     return best_match
 
-def process_writeup(writeup_data, ctf_tasks, min_threshold, verbose=False):
-    """Process a single writeup and return match result"""
+def process_writeup(writeup_entry, ctf_buckets, min_threshold, verbose=False):
+    """
+    Process a single writeup and return match result.
+    writeup_entry is (writeup_data, writeup_comp, writeup_task) as prepared by main().
+    """
+    writeup_data, writeup_comp, writeup_task = writeup_entry
     writeup_path = writeup_data.get('writeup_path', '')
     
-    if not writeup_path:
-        return None
-    
-    # Extract competition and task from writeup path
-    writeup_comp, writeup_task = extract_competition_task_from_writeup_path(writeup_path)
-    
-    if not writeup_comp or not writeup_task:
-        return None
-    
     # Find best matching CTF task
-    best_match = find_best_match_verbose(writeup_comp, writeup_task, ctf_tasks, min_threshold, verbose)
+    best_match = find_best_match_verbose(writeup_comp, writeup_task, ctf_buckets, min_threshold, verbose)
     
     if best_match:
         # Get the original task writeup
@@ -285,6 +350,63 @@ def process_writeup(writeup_data, ctf_tasks, min_threshold, verbose=False):
     
     return None
 
+def iter_jsonl_lines(path):
+    """Yield (line_number, line_bytes) from a JSONL file, splitting a read-only memory map on newlines"""
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+        
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            start = 0
+            line_num = 0
+            size = len(mm)
+            while start < size:
+                end = mm.find(b'\n', start)
+                if end < 0:
+                    end = size  # last line without a trailing newline
+                line_num += 1
+                yield line_num, mm[start:end]
+                start = end + 1
+
+def _json_dumps(obj, indent=False):
+    """Serialize obj to UTF-8 JSON bytes, with orjson when available"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0)
+    return json.dumps(obj, indent=2 if indent else None, ensure_ascii=False).encode('utf-8')
+
+def write_mapping_output(output_file, summary, task_writeup_mapping, ctf_tasks):
+    """
+    Write {"summary": ..., "task_writeup_mapping": {ctf_key: {"ctf_task_info", "writeups"}}}
+    one task entry per line, without building the whole document in memory.
+    """
+    with open(output_file, 'wb') as f:
+        f.write(b'{\n"summary": ')
+        f.write(_json_dumps(summary, indent=True))
+        f.write(b',\n"task_writeup_mapping": {')
+        
+        separator = b'\n'
+        for ctf_key, writeups in task_writeup_mapping.items():
+            f.write(separator)
+            f.write(_json_dumps(ctf_key))
+            f.write(b': ')
+            f.write(_json_dumps({'ctf_task_info': ctf_tasks[ctf_key], 'writeups': writeups}))
+            separator = b',\n'
+        
+        f.write(b'\n}\n}\n')
+
+# Per-process matching arguments, set once by the Pool initializer
+_worker_args = {}
+
+def _init_worker(ctf_buckets, min_threshold, verbose):
+    """Store the shared matching arguments in a worker process"""
+    _worker_args['ctf_buckets'] = ctf_buckets
+    _worker_args['min_threshold'] = min_threshold
+    _worker_args['verbose'] = verbose
+
+def _process_writeup_in_worker(writeup_entry):
+    """Pool entry point: match one writeup using the arguments stored by _init_worker"""
+    return process_writeup(writeup_entry, _worker_args['ctf_buckets'], _worker_args['min_threshold'], _worker_args['verbose'])
+
 def main():
     parser = argparse.ArgumentParser(description='Map writeups to CTF tasks using fuzzy matching with strict year filtering')
     parser.add_argument('--jsonl-file', default='writeups.jsonl',
@@ -306,11 +428,15 @@ def main():
     
     # Load CTF tasks
     print(f"Loading CTF tasks from {args.json_file}...")
-    with open(args.json_file, 'r') as f:
-        ctf_tasks = json.load(f)
+    with open(args.json_file, 'rb') as f:
+        ctf_tasks = _json_loads(f.read())
     
     print(f"Loaded {len(ctf_tasks)} CTF tasks")
     
+    # Competition/task/year only depend on the CTF path, so compute them once
+    ctf_index = build_ctf_index(ctf_tasks)
+    ctf_buckets = build_ctf_buckets(ctf_index)
+    
     # Load writeups
     print(f"Loading writeups from {args.jsonl_file}...")
     print(f"Using strict matching threshold: {args.min_threshold}")
@@ -321,45 +447,49 @@ def main():
     print(f"Using {args.workers} parallel workers")
     
     writeups_data = []
-    with open(args.jsonl_file, 'r') as f:
-        for line_num, line in enumerate(f, 1):
-            if args.limit > 0 and len(writeups_data) >= args.limit:
-                break
-                
-            if line.strip():
-                try:
-                    writeup_data = json.loads(line)
-                    if writeup_data.get('writeup_path'):
-                        writeups_data.append(writeup_data)
-                except json.JSONDecodeError as e:
-                    print(f"Error parsing line {line_num}: {e}")
-                    continue
+    for line_num, line in iter_jsonl_lines(args.jsonl_file):
+        if args.limit > 0 and len(writeups_data) >= args.limit:
+            break
+            
+        if line.strip():
+            try:
+                writeup_data = _json_loads(line)
+                if writeup_data.get('writeup_path'):
+                    writeups_data.append(writeup_data)
+            except json.JSONDecodeError as e:
+                print(f"Error parsing line {line_num}: {e}")
+                continue
     
     print(f"Loaded {len(writeups_data)} writeups")
     
+    # Normalise writeup paths once here rather than in the workers
+    writeup_entries = []
+    for writeup_data in writeups_data:
+        writeup_comp, writeup_task = extract_competition_task_from_writeup_path(writeup_data['writeup_path'])
+        if writeup_comp and writeup_task:
+            writeup_entries.append((writeup_data, writeup_comp, writeup_task))
+    
     # Process writeups in parallel
     print("Processing writeups in parallel...")
     task_writeup_mapping = defaultdict(list)
     matched_count = 0
     
-    # Create partial function with fixed arguments
-    process_func = partial(process_writeup, ctf_tasks=ctf_tasks, min_threshold=args.min_threshold, verbose=args.verbose)
+    # Batch writeups per dispatch; the CTF buckets are sent once per worker via the initializer
+    chunksize = max(1, len(writeup_entries) // (args.workers * 8))
     
-    # Process in parallel
-    with mp.Pool(processes=args.workers) as pool:
-        results = pool.map(process_func, writeups_data)
-    
-    # Collect results
-    for result in results:
-        if result:
-            matched_count += 1
-            task_writeup_mapping[result['ctf_key']].append(result['writeup_data'])
-            
-            if args.verbose:
-                print(f"✓ Matched: {result['writeup_data']['writeup_path']}")
-                print(f"  -> {ctf_tasks[result['ctf_key']]['path']} (score: {result['writeup_data']['match_score']:.3f})")
-                print(f"  Years: {result['writeup_data']['writeup_year']} == {result['writeup_data']['ctf_year']}")
-                print()
+    # Process in parallel, collecting results as they stream back (in input order)
+    with mp.Pool(processes=args.workers, initializer=_init_worker,
+                 initargs=(ctf_buckets, args.min_threshold, args.verbose)) as pool:
+        for result in pool.imap(_process_writeup_in_worker, writeup_entries, chunksize=chunksize):
+            if result:
+                matched_count += 1
+                task_writeup_mapping[result['ctf_key']].append(result['writeup_data'])
+                
+                if args.verbose:
+                    print(f"✓ Matched: {result['writeup_data']['writeup_path']}")
+                    print(f"  -> {ctf_tasks[result['ctf_key']]['path']} (score: {result['writeup_data']['match_score']:.3f})")
+                    print(f"  Years: {result['writeup_data']['writeup_year']} == {result['writeup_data']['ctf_year']}")
+                    print()
     
     total_count = len(writeups_data)
     
@@ -373,30 +503,19 @@ def main():
     print(f"Task coverage rate: {len(task_writeup_mapping)/len(ctf_tasks)*100:.1f}%")
     
     # Prepare output data
-    output_data = {
-        'summary': {
-            'total_writeups_processed': total_count,
-            'matched_writeups': matched_count,
-            'writeup_match_rate': matched_count/total_count,
-            'total_tasks_in_archive': len(ctf_tasks),
-            'tasks_with_writeups': len(task_writeup_mapping),
-            'task_coverage_rate': len(task_writeup_mapping)/len(ctf_tasks),
-            'min_threshold': args.min_threshold,
-            'workers_used': args.workers
-        },
-        'task_writeup_mapping': dict(task_writeup_mapping)
+    summary = {
+        'total_writeups_processed': total_count,
+        'matched_writeups': matched_count,
+        'writeup_match_rate': matched_count/total_count,
+        'total_tasks_in_archive': len(ctf_tasks),
+        'tasks_with_writeups': len(task_writeup_mapping),
+        'task_coverage_rate': len(task_writeup_mapping)/len(ctf_tasks),
+        'min_threshold': args.min_threshold,
+        'workers_used': args.workers
     }
     
-    # Add CTF task information to the mapping
-    for ctf_key, writeups in task_writeup_mapping.items():
-        output_data['task_writeup_mapping'][ctf_key] = {
-            'ctf_task_info': ctf_tasks[ctf_key],
-            'writeups': writeups
-        }
-    
-    # Save results
-    with open(args.output_file, 'w') as f:
-        json.dump(output_data, f, indent=2)
+    # Save results, streaming one task entry at a time with its CTF task information
+    write_mapping_output(args.output_file, summary, task_writeup_mapping, ctf_tasks)
     
     print(f"\nResults saved to {args.output_file}")
     
@@ -9,10 +9,123 @@ Functions here are pure utilities without external side effects, intended to be
 imported by the main orchestration script.
 """
 
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
-from typing import List, Tuple
+from typing import Dict, List, Optional, Tuple
 
+import codecs
+import mmap
+import os
 import re
+import stat
+import struct
+
+
+# Bytes decoded at a time for script detection (io.TextIOWrapper's default chunk size)
+_TEXT_WINDOW = 8192
+
+# File signatures that always mean a binary file (bytes.startswith tests them in one call)
+_BINARY_SIGNATURES = (
+    b'\x7fELF',          # ELF executable
+    b'MZ',               # PE executable
+    b'\xca\xfe\xba\xbe',  # Mach-O executable
+    b'\x89PNG',          # PNG image
+    b'\xff\xd8\xff',      # JPEG image
+    b'PK',               # ZIP/archive file
+)
+
+# Every byte that is not printable ASCII, tab, newline or carriage return
+_NON_PRINTABLE_BYTES = bytes(b for b in range(256) if not (32 <= b <= 126 or b in (9, 10, 13)))
+
+# Script language by file extension, used when the content gives no hint
+_EXTENSION_LANGUAGES = {
+    'py': 'python',
+    'js': 'node',
+    'mjs': 'node',
+    'php': 'php',
+    'sh': 'shell',
+    'bash': 'shell',
+    'rb': 'ruby',
+    'pl': 'perl',
+    'lua': 'lua',
+}
+
+# Whitespace that counts as printable in decoded text although str.isprintable() says otherwise
+_TEXT_WHITESPACE_DELETE = str.maketrans('', '', '\n\r\t')
+
+_LINE_BREAK_RE = re.compile(r'[\r\n]')
+
+# Interpreter names in a shebang line, in the order they are tried
+# ('sh' also covers 'bash', 'zsh' and 'dash')
+_SHEBANG_LANGUAGES = (
+    ('python', 'python'),
+    ('node', 'node'),
+    ('js', 'node'),
+    ('php', 'php'),
+    ('ruby', 'ruby'),
+    ('perl', 'perl'),
+    ('lua', 'lua'),
+    ('sh', 'shell'),
+)
+
+# Content patterns per script language, in the order they are tried
+_SCRIPT_PATTERNS = [
+    # Enhanced Python detection patterns
+    ('python', [
+        'import ', 'from ', 'def ', 'class ', 'if __name__',
+        'print(', 'print ', 'len(', 'str(', 'int(', 'list(',
+        'range(', 'open(', 'with open', 'for ', 'while ',
+        'try:', 'except:', 'finally:', 'else:', 'elif ',
+        '__init__', 'self.', 'return ', 'yield ', 'lambda ',
+        'isinstance(', 'hasattr(', 'getattr(', 'setattr('
+    ]),
+    ('node', ['require(', 'const ', 'let ', 'var ', 'function(']),
+    ('php', ['<?php', 'echo ', '$_GET', '$_POST']),
+    ('ruby', ['require ', 'class ', 'def ', 'end']),
+    ('perl', ['use ', 'my $', 'sub ', 'print ']),
+    ('lua', ['function ', 'local ', 'require']),
+    ('shell', ['#!/bin/sh', '#!/bin/bash', 'echo ', 'if [', 'for ']),
+]
+
+# One alternation per language, so each language costs a single scan of the content.
+# Patterns of different languages overlap ('def ', 'print ', 'require'), so the
+# languages cannot share one regex without losing the priority order above.
+_SCRIPT_PATTERN_RES = [
+    (language, re.compile('|'.join(map(re.escape, patterns))))
+    for language, patterns in _SCRIPT_PATTERNS
+]
+
+
+def _decode_text_head(mm: mmap.mmap, max_lines: int) -> str:
+    """
+    Strictly decode the start of a mapped file as UTF-8, window by window, until it holds
+    max_lines lines; these are the bytes a text-mode open decodes to read that many lines.
+    Raises UnicodeDecodeError for invalid data.
+    """
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    parts = []
+    line_breaks = 0
+    pos = 0
+    size = len(mm)
+    while pos < size:
+        end = pos + _TEXT_WINDOW
+        part = decoder.decode(mm[pos:end], final=end >= size)
+        parts.append(part)
+        line_breaks += part.count('\n') + part.count('\r')
+        pos = end
+        if line_breaks >= max_lines:
+            break
+    return ''.join(parts)
+
+
+def _count_printable_text(sample: str) -> int:
+    """Count the printable characters of decoded text, treating tab and line breaks as printable."""
+    if sample.translate(_TEXT_WHITESPACE_DELETE).isprintable():
+        return len(sample)  # Common case, decided in C
+    if sample.isascii():
+        return len(sample.encode('ascii').translate(None, _NON_PRINTABLE_BYTES))
+    return sum(1 for c in sample if c.isprintable() or c in '\n\r\t')
 
 
 def analyze_executable_content(file_path: Path) -> str:
@@ -21,132 +134,95 @@ def analyze_executable_content(file_path: Path) -> str:
     Returns one of: 'binary', 'python', 'node', 'php', 'ruby', 'perl', 'lua', 'shell'
     """
     try:
-        if not file_path.exists() or not file_path.is_file():
-            return 'binary'
+        # One stat instead of exists() + is_file(); a missing file raises and counts as binary
+        st = os.stat(file_path)
+        if not stat.S_ISREG(st.st_mode) or st.st_size == 0:
+            return 'binary'  # Nothing to analyze (and an empty file cannot be mapped)
+
+        return _analyze_executable_content_cached(os.fspath(file_path), st.st_ino, st.st_mtime_ns, st.st_size)
+
+    except Exception:
+        # If any error occurs, assume it's binary
+        return 'binary'
+
 
-        # First, check for binary file signatures before attempting text analysis
+@lru_cache(maxsize=4096)
+def _analyze_executable_content_cached(path: str, ino: int, mtime_ns: int, size: int) -> str:
+    """Classify a non-empty regular file; keyed on inode, mtime and size so edits and replacements invalidate."""
+    try:
+        # Map the file once and take both the binary and the text sample from the mapping
         try:
-            with open(file_path, 'rb') as f:
-                header = f.read(16)
-
-                # Check for common binary formats first
-                if header.startswith(b'\x7fELF'):
-                    return 'binary'  # ELF executable
-                elif header.startswith(b'MZ'):
-                    return 'binary'  # PE executable
-                elif header.startswith(b'\xca\xfe\xba\xbe'):
-                    return 'binary'  # Mach-O executable
-                elif header.startswith(b'\x89PNG'):
-                    return 'binary'  # PNG image
-                elif header.startswith(b'\xff\xd8\xff'):
-                    return 'binary'  # JPEG image
-                elif header.startswith(b'PK'):
-                    return 'binary'  # ZIP/archive file
-
-                # Check for null bytes (strong indicator of binary file)
-                f.seek(0)
-                chunk = f.read(1024)  # Read first 1KB
-                if b'\x00' in chunk:
-                    return 'binary'
-
-                # Check if the content has too many non-printable characters
-                printable_chars = sum(1 for b in chunk if 32 <= b <= 126 or b in [9, 10, 13])
-                if len(chunk) > 0 and printable_chars / len(chunk) < 0.7:
-                    return 'binary'
+            with open(path, 'rb') as f:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    header = mm[:16]
+
+                    # Check for common binary formats first
+                    if header.startswith(_BINARY_SIGNATURES):
+                        return 'binary'
+
+                    # Check for null bytes (strong indicator of binary file); most binaries
+                    # already have one in the header, so only scan further when it has none
+                    if b'\x00' in header:
+                        return 'binary'
+                    chunk = mm[:1024]  # First 1KB
+                    if b'\x00' in chunk:
+                        return 'binary'
+
+                    # Check if the content has too many non-printable characters
+                    printable_chars = len(chunk.translate(None, _NON_PRINTABLE_BYTES))
+                    if len(chunk) > 0 and printable_chars / len(chunk) < 0.7:
+                        return 'binary'
+
+                    # ASCII without carriage returns decodes to the same first 1KB of text,
+                    # so the count above also serves the text-level check below
+                    sample_is_chunk = chunk.isascii() and b'\r' not in chunk
+
+                    # Not valid UTF-8 text (no errors='ignore'), so treat it as binary
+                    text = _decode_text_head(mm, 10)
 
         except Exception:
-            # If binary reading fails, assume binary
+            # If reading or decoding fails, assume binary
             return 'binary'
 
         # If not clearly binary, try text analysis
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:  # Removed errors='ignore'
-                # Read first few lines to check for script indicators
-                first_lines = []
-                for _ in range(10):  # Read up to 10 lines
-                    line = f.readline()
-                    if not line:
-                        break
-                    first_lines.append(line.strip())
-
-                content_start = '\n'.join(first_lines).lower()
-
-                # Check for shebang lines first (most reliable)
-                if first_lines and first_lines[0].startswith('#!'):
-                    shebang = first_lines[0].lower()
-                    if 'python' in shebang:
-                        return 'python'
-                    elif 'node' in shebang or 'js' in shebang:
-                        return 'node'
-                    elif 'php' in shebang:
-                        return 'php'
-                    elif 'ruby' in shebang:
-                        return 'ruby'
-                    elif 'perl' in shebang:
-                        return 'perl'
-                    elif 'lua' in shebang:
-                        return 'lua'
-                    elif any(shell in shebang for shell in ['bash', 'sh', 'zsh', 'dash']):
-                        return 'shell'
-
-                # Check for script patterns in content
-                # Enhanced Python detection patterns
-                python_patterns = [
-                    'import ', 'from ', 'def ', 'class ', 'if __name__',
-                    'print(', 'print ', 'len(', 'str(', 'int(', 'list(',
-                    'range(', 'open(', 'with open', 'for ', 'while ',
-                    'try:', 'except:', 'finally:', 'else:', 'elif ',
-                    '__init__', 'self.', 'return ', 'yield ', 'lambda ',
-                    'isinstance(', 'hasattr(', 'getattr(', 'setattr('
-                ]
-
-                if any(pattern in content_start for pattern in python_patterns):
-                    return 'python'
-                elif any(pattern in content_start for pattern in ['require(', 'const ', 'let ', 'var ', 'function(']):
-                    return 'node'
-                elif any(pattern in content_start for pattern in ['<?php', 'echo ', '$_GET', '$_POST']):
-                    return 'php'
-                elif any(pattern in content_start for pattern in ['require ', 'class ', 'def ', 'end']):
-                    return 'ruby'
-                elif any(pattern in content_start for pattern in ['use ', 'my $', 'sub ', 'print ']):
-                    return 'perl'
-                elif any(pattern in content_start for pattern in ['function ', 'local ', 'require']):
-                    return 'lua'
-                elif any(pattern in content_start for pattern in ['#!/bin/sh', '#!/bin/bash', 'echo ', 'if [', 'for ']):
-                    return 'shell'
-
-                # Check if the content looks like readable text (could be a script without clear indicators)
-                # Read more content to make a better decision
-                f.seek(0)
-                sample = f.read(1024)  # Read first 1KB
-
-                # Check if it's mostly printable ASCII (likely a script)
-                printable_chars = sum(1 for c in sample if c.isprintable() or c in '\n\r\t')
-                if len(sample) > 0 and printable_chars / len(sample) > 0.8:
-                    # It's likely a text file/script, but we couldn't determine the type
-                    # Check file extension as fallback
-                    name = file_path.name.lower()
-                    if name.endswith('.py'):
-                        return 'python'
-                    elif name.endswith(('.js', '.mjs')):
-                        return 'node'
-                    elif name.endswith('.php'):
-                        return 'php'
-                    elif name.endswith(('.sh', '.bash')):
-                        return 'shell'
-                    elif name.endswith('.rb'):
-                        return 'ruby'
-                    elif name.endswith('.pl'):
-                        return 'perl'
-                    elif name.endswith('.lua'):
-                        return 'lua'
-                    else:
-                        # Default to shell script for unknown text files
-                        return 'shell'
-
-        except UnicodeDecodeError:
-            # File is not readable as UTF-8 text, it's binary
-            return 'binary'
+        # Check for shebang lines first (most reliable); that needs nothing past the first line
+        line_break = _LINE_BREAK_RE.search(text)
+        first_line = (text[:line_break.start()] if line_break else text).strip()
+        if first_line.startswith('#!'):
+            shebang = first_line.lower()
+            for interpreter, language in _SHEBANG_LANGUAGES:
+                if interpreter in shebang:
+                    return language
+
+        # Universal newlines, as a text-mode open would give
+        text = text.replace('\r\n', '\n').replace('\r', '\n')
+
+        # Read first few lines to check for script indicators
+        first_lines = text.split('\n', 10)  # Read up to 10 lines
+        if len(first_lines) > 10 or first_lines[-1] == '':
+            first_lines.pop()  # Drop the unread rest, or the empty tail after a final newline
+        first_lines = [line.strip() for line in first_lines]
+
+        content_start = '\n'.join(first_lines).lower()
+
+        # Check for script patterns in content; languages are tried in priority order
+        for language, pattern_re in _SCRIPT_PATTERN_RES:
+            if pattern_re.search(content_start):
+                return language
+
+        # Check if the content looks like readable text (could be a script without clear indicators)
+        # Read more content to make a better decision
+        sample = text[:1024]  # Read first 1KB
+
+        # Check if it's mostly printable ASCII (likely a script)
+        if not sample_is_chunk:
+            printable_chars = _count_printable_text(sample)
+        if len(sample) > 0 and printable_chars / len(sample) > 0.8:
+            # It's likely a text file/script, but we couldn't determine the type
+            # Check file extension as fallback
+            _, dot, extension = os.path.basename(path).lower().rpartition('.')
+            # Default to shell script for unknown text files
+            return _EXTENSION_LANGUAGES.get(extension, 'shell') if dot else 'shell'
 
         # Default to binary if we can't determine
         return 'binary'
@@ -156,60 +232,128 @@ def analyze_executable_content(file_path: Path) -> str:
         return 'binary'
 
 
+def _parse_elf_class(header: bytes) -> str:
+    """Map the e_ident[EI_CLASS] byte of an ELF header to '32', '64' or 'unknown'."""
+    # Check if it's an ELF file
+    if not header.startswith(b'\x7fELF'):
+        return 'unknown'
+
+    # Get architecture class from e_ident[EI_CLASS] (byte 4)
+    # ELFCLASS32 = 1, ELFCLASS64 = 2
+    elf_class = header[4]
+
+    if elf_class == 1:
+        return '32'
+    elif elf_class == 2:
+        return '64'
+
+    return 'unknown'
+
+
+@lru_cache(maxsize=4096)
+def _detect_elf_architecture_cached(path: str, ino: int, mtime_ns: int, size: int) -> str:
+    """Read the start of the ELF header; keyed on inode, mtime and size so edits and replacements invalidate."""
+    # Magic plus e_ident[EI_CLASS] is all we need. Raw open/pread/close skips the
+    # file object machinery, leaving three syscalls per file.
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        return _parse_elf_class(os.pread(fd, 5, 0))
+    finally:
+        os.close(fd)
+
+
 def detect_elf_architecture(file_path: Path) -> str:
     """
     Detect if an ELF binary is 32-bit or 64-bit.
     Returns: '32', '64', or 'unknown'
     """
     try:
-        if not file_path.exists() or not file_path.is_file():
+        st = os.stat(file_path)
+        if not stat.S_ISREG(st.st_mode) or st.st_size == 0:
             return 'unknown'
 
-        with open(file_path, 'rb') as f:
-            # Read ELF header
-            header = f.read(64)  # ELF header is 64 bytes
+        return _detect_elf_architecture_cached(os.fspath(file_path), st.st_ino, st.st_mtime_ns, st.st_size)
 
-            # Check if it's an ELF file
-            if not header.startswith(b'\x7fELF'):
-                return 'unknown'
+    except Exception:
+        return 'unknown'
 
-            # Get architecture class from e_ident[EI_CLASS] (byte 4)
-            # ELFCLASS32 = 1, ELFCLASS64 = 2
-            elf_class = header[4]
 
-            if elf_class == 1:
-                return '32'
-            elif elf_class == 2:
-                return '64'
+# Program header type of the segment naming the program interpreter
+_PT_INTERP = 3
 
-        return 'unknown'
 
-    except Exception:
-        return 'unknown'
+def _parse_pt_interp(elf: mmap.mmap) -> Optional[str]:
+    """Interpreter path from the PT_INTERP segment of a mapped ELF file, or None."""
+    # Same magic and class check as detect_elf_architecture
+    elf_class = _parse_elf_class(elf[:5])
+    if elf_class == 'unknown':
+        return None
+    # e_ident[EI_DATA]: 1 = little endian, 2 = big endian
+    endian = {1: '<', 2: '>'}.get(elf[5])
+    if endian is None:
+        return None
 
+    # Program header table location from the ELF header, and where p_offset/p_filesz
+    # sit inside each program header, per ELF class
+    if elf_class == '32':
+        phoff, phentsize, phnum = struct.unpack_from(endian + '28xI10xHH', elf)
+        segment_format = endian + '4xI8xI'
+    else:
+        phoff, phentsize, phnum = struct.unpack_from(endian + '32xQ14xHH', elf)
+        segment_format = endian + '4x4xQ16xQ'
 
-def get_binary_architecture(task_path: str, task_files: List[str]) -> Tuple[str, List[str]]:
+    for index in range(phnum):
+        header_offset = phoff + index * phentsize
+        (p_type,) = struct.unpack_from(endian + 'I', elf, header_offset)
+        if p_type == _PT_INTERP:
+            p_offset, p_filesz = struct.unpack_from(segment_format, elf, header_offset)
+            return elf[p_offset:p_offset + p_filesz].split(b'\0', 1)[0].decode('utf-8')
+    return None
+
+
+def read_elf_interpreter(file_path: Path) -> Optional[str]:
     """
-    Analyze all binary files in the task to determine if we need 32-bit or 64-bit environment.
-    Returns: (architecture, relevant_binary_files)
-    - architecture: '32', '64', or 'unknown'
-    - relevant_binary_files: list of binary files that should be processed
+    Read the program interpreter an ELF binary requests (its PT_INTERP segment), like
+    "/lib64/ld-linux-x86-64.so.2", straight from the mapped file.
+    Returns None for non-ELF files, binaries without an interpreter and unreadable files.
+    """
+    try:
+        with open(file_path, 'rb') as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                return _parse_pt_interp(mm)
+    except (OSError, ValueError, struct.error):
+        # ValueError covers empty files (cannot be mapped) and undecodable paths
+        return None
+
+
+# get_binary_architecture scans tasks with more files than this on a thread pool
+_ARCH_SCAN_SERIAL_LIMIT = 8
+_ARCH_SCAN_MAX_THREADS = 32
+
+
+def _binary_file_architecture(full_path: Path) -> str:
+    """Return '32' or '64' for an ELF binary, 'unknown' for anything else."""
+    # analyze_executable_content() classifies every file with an ELF signature as
+    # 'binary', and only ELF files have an architecture, so the ELF header read
+    # alone decides; other files are never opened a second time.
+    return detect_elf_architecture(full_path)
+
+
+def select_binary_architecture(file_architectures: Dict[str, str]) -> Tuple[str, List[str]]:
+    """
+    Apply the 32-bit-first priority logic to per-file architectures, as returned by
+    get_file_architectures. Returns the same (architecture, relevant_binary_files)
+    pair as get_binary_architecture.
     """
-    task_dir = Path(task_path)
     files_32bit = []
     files_64bit = []
 
-    for file_path in task_files:
-        full_path = task_dir / file_path
-
-        # First check if it's a binary
-        content_type = analyze_executable_content(full_path)
-        if content_type == 'binary':
-            arch = detect_elf_architecture(full_path)
-            if arch == '32':
-                files_32bit.append(file_path)
-            elif arch == '64':
-                files_64bit.append(file_path)
+    for file_path, arch in file_architectures.items():
+        if arch == '32':
+            files_32bit.append(file_path)
+        elif arch == '64' and not files_32bit:
+            # 64-bit files are only returned when there is no 32-bit one
+            files_64bit.append(file_path)
 
     # Priority logic: if 32-bit files exist, focus only on them and ignore 64-bit
     if files_32bit:
@@ -221,46 +365,81 @@ def get_binary_architecture(task_path: str, task_files: List[str]) -> Tuple[str,
         return '64', []
 
 
+def get_binary_architecture(task_path: str, task_files: List[str]) -> Tuple[str, List[str]]:
+    """
+    Analyze all binary files in the task to determine if we need 32-bit or 64-bit environment.
+    Returns: (architecture, relevant_binary_files)
+    - architecture: '32', '64', or 'unknown'
+    - relevant_binary_files: list of binary files that should be processed
+    """
+    return select_binary_architecture(get_file_architectures(task_path, task_files))
+
+
+def get_file_architectures(task_path: str, task_files: List[str]) -> Dict[str, str]:
+    """
+    Read the ELF class of every task file in one sweep.
+    Returns {file_path: '32' | '64' | 'unknown'} in task_files order.
+    """
+    task_dir = Path(task_path)
+    full_paths = [task_dir / file_path for file_path in task_files]
+    # The per-file checks are independent and I/O bound, so larger tasks read files concurrently
+    if len(full_paths) > _ARCH_SCAN_SERIAL_LIMIT:
+        with ThreadPoolExecutor(max_workers=min(_ARCH_SCAN_MAX_THREADS, len(full_paths))) as executor:
+            archs = list(executor.map(_binary_file_architecture, full_paths))
+    else:
+        archs = [_binary_file_architecture(full_path) for full_path in full_paths]
+    return dict(zip(task_files, archs))
+
+
+# 'socket' also covers 'socketserver'
+_SERVER_HINT_RE = re.compile(rb'socket|threading|asyncio')
+
+# Common patterns for port definition, in priority order
+# e.g., port = 8080 or ("0.0.0.0", 8080)
+_PORT_PATTERN_RES = [
+    re.compile(pattern, re.IGNORECASE)
+    for pattern in (
+        rb'port\s*=\s*(\d+)',
+        rb'listen\(\s*(\d+)\)',
+        rb'bind\(\s*\([^,]+,\s*(\d+)\s*\)\s*\)',
+        rb'host,\s*port\s*=\s*[^,]+,\s*(\d+)',
+        rb'server_address\s*=\s*\([^,]+,\s*(\d+)\s*\)'
+    )
+]
+
+
 def analyze_python_server_script(file_path: Path) -> Tuple[bool, int | None, str]:
     """
     Analyze a Python script to check if it's a network server.
     Returns (is_server, port, content).
     """
     try:
-        if not file_path.exists() or not file_path.is_file():
+        st = os.stat(file_path)
+        if not stat.S_ISREG(st.st_mode):
             return False, None, ""
 
-        with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-            content = f.read()
-
-        # Check for server-related imports
-        is_server = ('socketserver' in content or
-                     'socket' in content or
-                     'threading' in content or
-                     'asyncio' in content)
-
-        if not is_server:
-            return False, None, content
-
-        # Try to find the port number
-        port = None
-        # Common patterns for port definition
-        # e.g., port = 8080 or ("0.0.0.0", 8080)
-        port_patterns = [
-            r'port\s*=\s*(\d+)',
-            r'listen\(\s*(\d+)\)',
-            r'bind\(\s*\([^,]+,\s*(\d+)\s*\)\s*\)',
-            r'host,\s*port\s*=\s*[^,]+,\s*(\d+)',
-            r'server_address\s*=\s*\([^,]+,\s*(\d+)\s*\)'
-        ]
-
-        for pattern in port_patterns:
-            match = re.search(pattern, content, re.IGNORECASE)
-            if match:
-                port = int(match.group(1))
-                break
-
-        return True, port, content
+        with open(file_path, 'rb') as f:
+            if st.st_size == 0:
+                return False, None, ""  # An empty file cannot be mapped
+            # The patterns are searched on the raw bytes and each search stops at its first match
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                # Check for server-related imports
+                is_server = _SERVER_HINT_RE.search(mm) is not None
+
+                # Try to find the port number
+                port = None
+                if is_server:
+                    for pattern in _PORT_PATTERN_RES:
+                        match = pattern.search(mm)
+                        if match:
+                            port = int(match.group(1))
+                            break
+
+                # Same text a text-mode open with errors='ignore' would return
+                content = mm[:].decode('utf-8', errors='ignore')
+        content = content.replace('\r\n', '\n').replace('\r', '\n')
+
+        return is_server, port, content
 
     except Exception:
         return False, None, ""
@@ -2,23 +2,49 @@
 CTF Forge utility functions for Dockerfile generation and challenge analysis.
 """
 
+import copy
+import ctypes
+import json
+import mmap
+import os
+import random
 import subprocess
 import re
 import time
 import tempfile
 import shutil
+import stat
 import zipfile
 import tarfile
+from bisect import bisect_left
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from functools import lru_cache, partial
 from pathlib import Path
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
 
 import litellm
 from litellm import completion
 
+try:
+    from elftools.elf.elffile import ELFFile  # optional: read version definitions straight from the ELF
+except ImportError:
+    ELFFile = None
+
+try:
+    import libarchive  # optional: libarchive-c lists zip, tar, 7z and rar archives in C
+except ImportError:
+    libarchive = None
+
 from forge.analysis import (
     analyze_executable_content,
     detect_elf_architecture,
+    read_elf_interpreter,
     get_binary_architecture,
+    get_file_architectures,
+    select_binary_architecture,
     analyze_python_server_script,
 )
 from forge.files import get_file_type_info
@@ -31,6 +57,34 @@ BLUE = "\033[94m"
 RESET = "\033[0m"
 
 
+# Errors that won't fix themselves on retry (e.g., wrong provider)
+_NON_RETRYABLE_ERRORS = ("BadRequestError", "LLM Provider NOT provided")
+
+
+def _retry_after_seconds(error: Exception) -> Optional[float]:
+    """
+    Return the wait requested by a Retry-After response header, or None if the error
+    carries no usable header. Both delta-seconds and HTTP-date forms are accepted.
+    """
+    try:
+        retry_after = error.response.headers.get('Retry-After')
+    except Exception:
+        return None
+    if not retry_after:
+        return None
+    try:
+        return max(0.0, float(retry_after))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(retry_after)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
 def call_by_litllm(messages, model, max_retries=50, backoff_base=2):
     """
     Calls litellm completion with retries and exponential backoff.
@@ -52,14 +106,18 @@ def call_by_litllm(messages, model, max_retries=50, backoff_base=2):
             if "long" in error_str:
                 return None
             # Don't retry on BadRequestError (e.g., wrong provider) - it won't fix itself
-            if "BadRequestError" in error_str or "LLM Provider NOT provided" in error_str:
+            if any(marker in error_str for marker in _NON_RETRYABLE_ERRORS):
                 print(f"Error: {e}")
                 raise
             print(f"Error: {e}")
             attempt += 1
             if attempt == max_retries:
                 raise
-            wait_time = 10
+            # Prefer the provider's Retry-After; otherwise back off exponentially with jitter
+            # so concurrent workers don't retry in lockstep
+            wait_time = _retry_after_seconds(e)
+            if wait_time is None:
+                wait_time = min(60, random.uniform(backoff_base, backoff_base * 2 ** attempt))
             time.sleep(wait_time)
 
 
@@ -68,6 +126,13 @@ def detect_provided_libraries(task_path: str, available_files: List[str]) -> Dic
     Detect if custom libraries are provided in the task folder.
     Returns dict with library types and their paths.
     """
+    # Callers get their own copy; the cached dict is shared
+    return dict(_detect_provided_libraries_cached(tuple(available_files)))
+
+
+@lru_cache(maxsize=256)
+def _detect_provided_libraries_cached(available_files: Tuple[str, ...]) -> Dict[str, str]:
+    """Run the actual library detection for detect_provided_libraries (depends on file names only)."""
     provided_libs = {}
     
     for file_path in available_files:
@@ -89,48 +154,137 @@ def detect_provided_libraries(task_path: str, available_files: List[str]) -> Dic
     return provided_libs
 
 
+# detect_glibc_version results, keyed by (st_dev, st_ino, st_size, st_mtime_ns) of the libc file
+_GLIBC_VERSION_CACHE: Dict[tuple, Optional[str]] = {}
+
+
 def detect_glibc_version(libc_path: Path) -> Optional[str]:
     """
     Detect GLIBC version from a libc.so.6 file.
     Returns version string like "2.23" or None if detection fails.
     """
     try:
-        if not libc_path.exists():
-            return None
-            
-        # Try to extract version using strings command
-        result = subprocess.run(['strings', str(libc_path)], 
-                              capture_output=True, text=True, timeout=10)
-        
-        if result.returncode == 0:
-            # Look for GNU C Library version string
-            for line in result.stdout.split('\n'):
-                if 'GNU C Library' in line and 'stable release version' in line:
-                    # Extract version number (e.g., "2.23")
-                    version_match = re.search(r'version\s+(\d+\.\d+)', line)
-                    if version_match:
-                        return version_match.group(1)
-                        
-        # Fallback: try readelf to get version information
-        result = subprocess.run(['readelf', '-V', str(libc_path)], 
-                              capture_output=True, text=True, timeout=10)
-        
-        if result.returncode == 0:
-            # Look for GLIBC version in version symbols
-            for line in result.stdout.split('\n'):
-                if 'GLIBC_' in line:
-                    # Extract highest GLIBC version found
-                    versions = re.findall(r'GLIBC_(\d+\.\d+)', line)
-                    if versions:
-                        # Return the highest version found
-                        return max(versions, key=lambda v: tuple(map(int, v.split('.'))))
-                        
+        st = libc_path.stat()
+    except OSError:
+        return None
+
+    # The same libc is inspected for the base image and again for the library tests
+    key = (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns)
+    if key not in _GLIBC_VERSION_CACHE:
+        _GLIBC_VERSION_CACHE[key] = _detect_glibc_version_uncached(libc_path)
+    return _GLIBC_VERSION_CACHE[key]
+
+
+# A run of characters `strings` would print (printable ASCII and tab)
+_PRINTABLE_RUN_RE = re.compile(rb'[\t\x20-\x7e]*')
+_NON_PRINTABLE_RE = re.compile(rb'[^\t\x20-\x7e]')
+_GLIBC_BANNER_VERSION_RE = re.compile(rb'version\s+(\d+\.\d+)')
+_GLIBC_SYMBOL_VERSION_RE = re.compile(rb'GLIBC_(\d+)\.(\d+)')
+_GLIBC_RELEASE_RE = re.compile(r'\d+\.\d+')
+_GLIBC_VERSION_NAME_RE = re.compile(r'GLIBC_(\d+)\.(\d+)')
+
+
+def _readelf_versions_pyelf(libc_path: Path) -> Optional[str]:
+    """
+    Highest GLIBC_x.y version defined in the .gnu.version_d section, read with pyelftools.
+    Only the section headers and that section are parsed. Returns None if pyelftools is
+    unavailable or the library defines no GLIBC versions.
+    """
+    if ELFFile is None:
+        return None
+    try:
+        with open(libc_path, 'rb') as f:
+            section = ELFFile(f).get_section_by_name('.gnu.version_d')
+            if section is None:
+                return None
+            names = {verdaux.name for _verdef, verdaux_iter in section.iter_versions() for verdaux in verdaux_iter}
+    except Exception:
+        return None
+    best = max(((int(m.group(1)), int(m.group(2))) for m in map(_GLIBC_VERSION_NAME_RE.fullmatch, names) if m),
+               default=None)
+    return '%d.%d' % best if best else None
+
+
+def _detect_glibc_version_uncached(libc_path: Path) -> Optional[str]:
+    """Run the actual GLIBC version detection for detect_glibc_version."""
+    try:
+        with open(libc_path, 'rb') as f:
+            if libc_path.stat().st_size == 0:
+                return None  # Nothing to scan (and an empty file cannot be mapped)
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                # Look for GNU C Library version string, i.e. the printable run
+                # around each occurrence, as `strings` would print it
+                pos = mm.find(b'GNU C Library')
+                while pos != -1:
+                    window = mm[max(0, pos - 4096):pos]
+                    # Searching the reversed window finds the nearest non-printable byte before pos
+                    boundary = _NON_PRINTABLE_RE.search(window[::-1])
+                    run_start = pos - (boundary.start() if boundary else len(window))
+                    run_end = _PRINTABLE_RUN_RE.match(mm, pos).end()
+                    line = mm[run_start:run_end]
+                    if b'stable release version' in line:
+                        # Extract version number (e.g., "2.23")
+                        version_match = _GLIBC_BANNER_VERSION_RE.search(line)
+                        if version_match:
+                            return version_match.group(1).decode('ascii')
+                    pos = mm.find(b'GNU C Library', run_end)
+
+                # Fallback: the highest GLIBC_x.y symbol version the library defines,
+                # or, without pyelftools, any GLIBC_x.y symbol version it mentions
+                defined_version = _readelf_versions_pyelf(libc_path)
+                if defined_version:
+                    return defined_version
+                best = max(((int(major), int(minor)) for major, minor in set(_GLIBC_SYMBOL_VERSION_RE.findall(mm))),
+                           default=None)
+                if best:
+                    return '%d.%d' % best
+
     except Exception as e:
         print(f"{YELLOW}Warning: Could not detect GLIBC version from {libc_path}: {e}{RESET}")
         
     return None
 
 
+@lru_cache(maxsize=None)
+def _system_glibc_version() -> Optional[str]:
+    """
+    GLIBC version of the running system, like "2.35", asked of the already loaded libc.
+    Returns None on systems without glibc.
+    """
+    try:
+        libc = ctypes.CDLL("libc.so.6")
+        libc.gnu_get_libc_version.restype = ctypes.c_char_p
+        version_match = _GLIBC_RELEASE_RE.match(libc.gnu_get_libc_version().decode('ascii'))
+        return version_match.group(0) if version_match else None
+    except Exception:
+        return None
+
+
+# Map GLIBC versions to compatible Ubuntu versions
+_GLIBC_UBUNTU_MAP: Dict[str, str] = {
+    "2.23": "ubuntu:16.04",  # Ubuntu 16.04 LTS
+    "2.24": "ubuntu:16.04",  # Stay with 16.04 for compatibility
+    "2.25": "ubuntu:17.04",  # Ubuntu 17.04 (but use 18.04 for LTS)
+    "2.26": "ubuntu:18.04",  # Ubuntu 18.04 LTS
+    "2.27": "ubuntu:18.04",  # Ubuntu 18.04 LTS
+    "2.28": "ubuntu:18.04",  # Ubuntu 18.04 LTS
+    "2.29": "ubuntu:19.04",  # Ubuntu 19.04 (but use 20.04 for LTS)
+    "2.30": "ubuntu:20.04",  # Ubuntu 20.04 LTS
+    "2.31": "ubuntu:20.04",  # Ubuntu 20.04 LTS
+    "2.32": "ubuntu:20.04",  # Ubuntu 20.04 LTS
+    "2.33": "ubuntu:21.04",  # Ubuntu 21.04 (but use 22.04 for LTS)
+    "2.34": "ubuntu:21.10",  # Ubuntu 21.10 (but use 22.04 for LTS)
+    "2.35": "ubuntu:22.04",  # Ubuntu 22.04 LTS
+    "2.36": "ubuntu:22.04",  # Ubuntu 22.04 LTS
+    "2.37": "ubuntu:22.04",  # Ubuntu 22.04 LTS
+    "2.38": "ubuntu:23.04",  # Ubuntu 23.04 (but use 22.04 for stability)
+}
+
+# Fallback for GLIBC 2.x versions missing from the map: the highest minor version each image covers
+_GLIBC_FALLBACK_MAX_MINOR = (23, 27, 31)
+_GLIBC_FALLBACK_IMAGES = ("ubuntu:16.04", "ubuntu:18.04", "ubuntu:20.04", "ubuntu:22.04")
+
+
 def select_compatible_base_image(provided_libs: Dict[str, str], task_path: str = "") -> str:
     """
     Select the most compatible base image based on provided libraries.
@@ -149,28 +303,8 @@ def select_compatible_base_image(provided_libs: Dict[str, str], task_path: str =
         glibc_version = detect_glibc_version(libc_path)
         
         if glibc_version:
-            # Map GLIBC versions to compatible Ubuntu versions
-            version_mapping = {
-                "2.23": "ubuntu:16.04",  # Ubuntu 16.04 LTS
-                "2.24": "ubuntu:16.04",  # Stay with 16.04 for compatibility
-                "2.25": "ubuntu:17.04",  # Ubuntu 17.04 (but use 18.04 for LTS)
-                "2.26": "ubuntu:18.04",  # Ubuntu 18.04 LTS
-                "2.27": "ubuntu:18.04",  # Ubuntu 18.04 LTS
-                "2.28": "ubuntu:18.04",  # Ubuntu 18.04 LTS
-                "2.29": "ubuntu:19.04",  # Ubuntu 19.04 (but use 20.04 for LTS)
-                "2.30": "ubuntu:20.04",  # Ubuntu 20.04 LTS
-                "2.31": "ubuntu:20.04",  # Ubuntu 20.04 LTS
-                "2.32": "ubuntu:20.04",  # Ubuntu 20.04 LTS
-                "2.33": "ubuntu:21.04",  # Ubuntu 21.04 (but use 22.04 for LTS)
-                "2.34": "ubuntu:21.10",  # Ubuntu 21.10 (but use 22.04 for LTS)
-                "2.35": "ubuntu:22.04",  # Ubuntu 22.04 LTS
-                "2.36": "ubuntu:22.04",  # Ubuntu 22.04 LTS
-                "2.37": "ubuntu:22.04",  # Ubuntu 22.04 LTS
-                "2.38": "ubuntu:23.04",  # Ubuntu 23.04 (but use 22.04 for stability)
-            }
-            
             # Find the best match
-            compatible_base = version_mapping.get(glibc_version)
+            compatible_base = _GLIBC_UBUNTU_MAP.get(glibc_version)
             if compatible_base:
                 return compatible_base
             else:
@@ -179,14 +313,9 @@ def select_compatible_base_image(provided_libs: Dict[str, str], task_path: str =
                 if len(version_parts) >= 2:
                     major, minor = int(version_parts[0]), int(version_parts[1])
                     
-                    if major == 2 and minor <= 23:
-                        return "ubuntu:16.04"
-                    elif major == 2 and minor <= 27:
-                        return "ubuntu:18.04"
-                    elif major == 2 and minor <= 31:
-                        return "ubuntu:20.04"
-                    else:
+                    if major != 2:
                         return "ubuntu:22.04"  # For newer versions
+                    return _GLIBC_FALLBACK_IMAGES[bisect_left(_GLIBC_FALLBACK_MAX_MINOR, minor)]
                         
         else:
             print(f"{YELLOW}Could not detect GLIBC version, using default base image{RESET}")
@@ -194,36 +323,305 @@ def select_compatible_base_image(provided_libs: Dict[str, str], task_path: str =
     return default_base
 
 
-def test_binary_library_configurations(task_path: str, binary_files: List[str], provided_libs: Dict[str, str], verbose: bool = False) -> Dict[str, Any]:
+@dataclass(slots=True)
+class LibConfigResult:
+    """Outcome of test_binary_library_configurations: which library setup works and how to apply it."""
+    working_config: str = "unknown"
+    commands: List[str] = field(default_factory=list)
+    reason: str = "No working configuration found"
+    system_libs: bool = False
+    custom_libc_only: bool = False
+    custom_dynamic_linker: bool = False
+    detected_issues: List[str] = field(default_factory=list)
+    recommended_base_image: str = "ubuntu:20.04"
+
+
+# test_binary_library_configurations results by input identity, persisted across runs
+_LIB_CONFIG_CACHE: Dict[str, Dict[str, Any]] = {}
+_LIB_CONFIG_CACHE_FILE = Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache") / "ctf_forge" / "lib_config.json"
+_lib_config_cache_loaded = False
+# Bumped when the tests change in a way that invalidates stored results
+_LIB_CONFIG_CACHE_VERSION = 2
+
+
+def _lib_config_cache_key(task_path: str, test_binary: str, provided_libs: Dict[str, str]) -> Optional[str]:
+    """
+    Identify a library test by the files it runs (path, size, mtime) and the system GLIBC.
+    Returns None when one of the files cannot be stat'ed, which disables caching for the call.
+    """
+    key: List[Any] = [_LIB_CONFIG_CACHE_VERSION, _system_glibc_version()]
+    for role, rel_path in (("binary", test_binary),
+                           ("libc", provided_libs.get("libc")),
+                           ("dynamic_linker", provided_libs.get("dynamic_linker"))):
+        if rel_path is None:
+            key.append([role, None])
+            continue
+        full_path = os.path.abspath(os.path.join(task_path, rel_path))
+        try:
+            st = os.stat(full_path)
+        except OSError:
+            return None
+        key.append([role, rel_path, full_path, st.st_size, st.st_mtime_ns])
+    return json.dumps(key)
+
+
+def _load_lib_config_cache() -> None:
+    """Read the persisted library test results once per process."""
+    global _lib_config_cache_loaded
+    if _lib_config_cache_loaded:
+        return
+    _lib_config_cache_loaded = True
+    try:
+        with open(_LIB_CONFIG_CACHE_FILE, 'r', encoding='utf-8') as f:
+            _LIB_CONFIG_CACHE.update(json.load(f))
+    except Exception:
+        pass
+
+
+def _store_lib_config_cache(key: str, test_results: Dict[str, Any]) -> None:
+    """
+    Remember a library test result (as a LibConfigResult field dict) and persist it, merged with
+    results other workers wrote. Each store rereads and rewrites the file; stores are rare next to
+    the tests they save. Two workers storing at once race, and the last one to replace the file
+    wins, so an entry can be lost. That only means the test runs again later.
+    """
+    _LIB_CONFIG_CACHE[key] = test_results
+    try:
+        try:
+            with open(_LIB_CONFIG_CACHE_FILE, 'r', encoding='utf-8') as f:
+                persisted = json.load(f)
+        except (OSError, ValueError):
+            persisted = {}
+        persisted[key] = test_results
+        _LIB_CONFIG_CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
+        # Write to a temporary file first so concurrent readers never see a partial file
+        fd, tmp_path = tempfile.mkstemp(dir=_LIB_CONFIG_CACHE_FILE.parent, suffix=".tmp")
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(persisted, f)
+        os.replace(tmp_path, _LIB_CONFIG_CACHE_FILE)
+    except Exception:
+        pass
+
+
+def test_binary_library_configurations(task_path: str, binary_files: List[str], provided_libs: Dict[str, str], verbose: bool = False) -> LibConfigResult:
     """
     Test different library configurations to determine which one works.
-    Returns dict with working configuration and commands needed.
+    Returns a LibConfigResult with the working configuration and commands needed.
+    Results are cached while the binary, libc and dynamic linker stay unchanged, unless a
+    test could not run (e.g. patchelf missing): that says more about this host than the binary.
+    """
+    if not binary_files:
+        return _test_binary_library_configurations_uncached(task_path, binary_files, provided_libs, verbose)[0]
+
+    key = _lib_config_cache_key(task_path, binary_files[0], provided_libs)
+    if key is None:
+        return _test_binary_library_configurations_uncached(task_path, binary_files, provided_libs, verbose)[0]
+
+    _load_lib_config_cache()
+    if key in _LIB_CONFIG_CACHE:
+        try:
+            cached = LibConfigResult(**copy.deepcopy(_LIB_CONFIG_CACHE[key]))
+        except TypeError:
+            cached = None  # Entry written in another format; test again
+        if cached is not None:
+            if verbose:
+                print(f"{BLUE}Using cached library test result for {binary_files[0]}: {cached.working_config} - {cached.reason}{RESET}")
+            return cached
+
+    test_results, tests_ran = _test_binary_library_configurations_uncached(task_path, binary_files, provided_libs, verbose)
+    if tests_ran:
+        _store_lib_config_cache(key, asdict(test_results))
+    return test_results
+
+
+def _link_or_copy(src: Path, dst: Path, writable: bool = False) -> None:
+    """
+    Stage a file for a library test. Read-only inputs are hardlinked (a single directory
+    entry instead of a full data copy); files that will be patched, or that live on another
+    filesystem, are copied without metadata.
+    """
+    if not writable:
+        try:
+            os.link(src, dst)
+            return
+        except OSError:
+            pass
+    shutil.copy(src, dst)
+
+
+def _run_test_binary(temp_binary: Path, temp_dir: str) -> subprocess.CompletedProcess:
+    """Run a copied test binary with a newline on stdin; raises TimeoutExpired after 3 seconds."""
+    return subprocess.run(
+        [str(temp_binary)], 
+        cwd=temp_dir,
+        capture_output=True, 
+        text=True, 
+        timeout=3,
+        input="\n"
+    )
+
+
+def _test_system_libs(temp_dir: str, test_binary_path: Path) -> Tuple[bool, List[str], List[str], bool]:
+    """
+    Test 1: System libraries (no custom libs) - with better error detection.
+    Returns (works, detected_issues, verbose_log_lines, ran); ran is False when the test raised.
+    """
+    issues: List[str] = []
+    log = [f"{BLUE}  Testing system libraries...{RESET}"]
+    try:
+        temp_binary = Path(temp_dir) / "bin.sys"
+        _link_or_copy(test_binary_path, temp_binary)
+        
+        # Test if binary runs with system libraries
+        result = _run_test_binary(temp_binary, temp_dir)
+        
+        # Analyze the result more carefully
+        exit_code = result.returncode
+        stderr_output = result.stderr.lower()
+        
+        # Check for specific error patterns
+        segfault_indicators = [
+            exit_code == -11,  # SIGSEGV
+            'segmentation fault' in stderr_output,
+            'core dumped' in stderr_output
+        ]
+        
+        library_error_indicators = [
+            'cannot execute binary file' in stderr_output,
+            'no such file or directory' in stderr_output and 'ld-linux' in stderr_output,
+            'wrong elf class' in stderr_output,
+            'incompatible' in stderr_output
+        ]
+        
+        if any(segfault_indicators):
+            issues.append("Binary segfaults with system libraries")
+            log.append(f"{RED}    ✗ System libraries cause segfault (exit code: {exit_code}){RESET}")
+        elif any(library_error_indicators):
+            issues.append("Binary has library compatibility issues")
+            log.append(f"{RED}    ✗ System libraries have compatibility issues{RESET}")
+        else:
+            log.append(f"{GREEN}    ✓ System libraries work (exit code: {exit_code}){RESET}")
+            return True, issues, log, True
+                
+    except subprocess.TimeoutExpired:
+        # Timeout might indicate the binary is waiting for input (which is good)
+        log.append(f"{GREEN}    ✓ System libraries work (timed out waiting for input){RESET}")
+        return True, issues, log, True
+    except Exception as e:
+        log.append(f"{YELLOW}    ? System libraries test failed: {str(e)[:50]}{RESET}")
+        return False, issues, log, False
+    
+    return False, issues, log, True
+
+
+def _test_custom_libc(temp_dir: str, test_binary_path: Path, staging_error: Optional[Exception]) -> Tuple[bool, List[str], List[str], bool]:
+    """
+    Test 2: Custom libc only (enhanced).
+    Returns (works, detected_issues, verbose_log_lines, ran); ran is False when the test raised.
+    """
+    issues: List[str] = []
+    log = [f"{BLUE}  Testing custom libc with system dynamic linker...{RESET}"]
+    try:
+        if staging_error is not None:
+            raise staging_error
+        temp_binary = Path(temp_dir) / "bin.libc"
+        _link_or_copy(test_binary_path, temp_binary, writable=True)
+        
+        # Try to patch the binary to use custom libc
+        patchelf_result = subprocess.run(
+            ['patchelf', '--set-rpath', '.', str(temp_binary)], 
+            capture_output=True, text=True, timeout=10
+        )
+        
+        if patchelf_result.returncode != 0:
+            issues.append("patchelf failed to set rpath")
+            log.append(f"{RED}    ✗ patchelf failed: {patchelf_result.stderr}{RESET}")
+        else:
+            # Test the patched binary
+            result = _run_test_binary(temp_binary, temp_dir)
+            
+            if result.returncode != -11:  # Not a segfault
+                log.append(f"{GREEN}    ✓ Custom libc with system dynamic linker works{RESET}")
+                return True, issues, log, True
+            issues.append("Custom libc with system linker still segfaults")
+            log.append(f"{RED}    ✗ Custom libc with system dynamic linker causes segfault{RESET}")
+                
+    except subprocess.TimeoutExpired:
+        log.append(f"{GREEN}    ✓ Custom libc works (timed out waiting for input){RESET}")
+        return True, issues, log, True
+    except Exception as e:
+        issues.append(f"Custom libc test failed: {str(e)}")
+        log.append(f"{YELLOW}    ? Custom libc test failed: {str(e)[:50]}{RESET}")
+        return False, issues, log, False
+    
+    return False, issues, log, True
+
+
+def _test_custom_dynamic_linker(temp_dir: str, test_binary_path: Path, provided_libs: Dict[str, str], staging_error: Optional[Exception]) -> Tuple[bool, List[str], List[str], bool]:
+    """
+    Test 3: Custom dynamic linker + custom libc (enhanced).
+    Returns (works, detected_issues, verbose_log_lines, ran); ran is False when the test raised.
+    """
+    issues: List[str] = []
+    log = [f"{BLUE}  Testing custom dynamic linker + custom libc...{RESET}"]
+    try:
+        if staging_error is not None:
+            raise staging_error
+        temp_binary = Path(temp_dir) / "bin.full"
+        _link_or_copy(test_binary_path, temp_binary, writable=True)
+        
+        # Patch binary to use custom interpreter and rpath in a single patchelf run
+        patchelf_result = subprocess.run(
+            ['patchelf', '--set-interpreter', f'./{provided_libs["dynamic_linker"]}', '--set-rpath', '.', str(temp_binary)], 
+            capture_output=True, text=True, timeout=10
+        )
+        
+        if patchelf_result.returncode != 0:
+            issues.append("patchelf failed to set interpreter or rpath")
+            log.append(f"{RED}    ✗ patchelf failed to set interpreter or rpath{RESET}")
+        else:
+            # Test the patched binary
+            result = _run_test_binary(temp_binary, temp_dir)
+            
+            if result.returncode != -11:  # Not a segfault
+                log.append(f"{GREEN}    ✓ Custom dynamic linker + custom libc works{RESET}")
+                return True, issues, log, True
+            issues.append("Custom dynamic linker + custom libc still segfaults")
+            log.append(f"{RED}    ✗ Custom dynamic linker + custom libc causes segfault{RESET}")
+                
+    except subprocess.TimeoutExpired:
+        log.append(f"{GREEN}    ✓ Custom dynamic linker + custom libc works (timed out waiting for input){RESET}")
+        return True, issues, log, True
+    except Exception as e:
+        issues.append(f"Custom dynamic linker test failed: {str(e)}")
+        log.append(f"{YELLOW}    ? Custom dynamic linker test failed: {str(e)[:50]}{RESET}")
+        return False, issues, log, False
+    
+    return False, issues, log, True
+
+
+def _test_binary_library_configurations_uncached(task_path: str, binary_files: List[str], provided_libs: Dict[str, str], verbose: bool = False) -> Tuple[LibConfigResult, bool]:
+    """
+    Run the actual library configuration tests for test_binary_library_configurations.
+    Returns the result and whether every test it depends on actually ran (none raised).
     """
     import tempfile
     import shutil
     
     if not binary_files:
-        return {"working_config": "none", "commands": [], "reason": "No binary files to test"}
+        return LibConfigResult(working_config="none", reason="No binary files to test"), True
     
     task_dir = Path(task_path)
-    test_results = {
-        "system_libs": False,
-        "custom_libc_only": False,
-        "custom_dynamic_linker": False,
-        "working_config": "unknown",
-        "commands": [],
-        "reason": "No working configuration found",
-        "detected_issues": [],
-        "recommended_base_image": "ubuntu:20.04"
-    }
+    test_results = LibConfigResult()
+    tests_ran = True
     
     # Test with the first binary file (usually the main executable)
     test_binary = binary_files[0]
     test_binary_path = task_dir / test_binary
     
     if not test_binary_path.exists():
-        test_results["reason"] = f"Test binary {test_binary} not found"
-        return test_results
+        test_results.reason = f"Test binary {test_binary} not found"
+        return test_results, False
     
     if verbose:
         print(f"{BLUE}Testing library configurations for {test_binary}...{RESET}")
@@ -235,234 +633,99 @@ def test_binary_library_configurations(task_path: str, binary_files: List[str],
         
         if custom_glibc_version:
             # Get system GLIBC version for comparison
-            try:
-                result = subprocess.run(['/lib/x86_64-linux-gnu/libc.so.6'], 
-                                      capture_output=True, text=True, timeout=5)
-                if result.returncode == 0:
-                    system_glibc_match = re.search(r'version\s+(\d+\.\d+)', result.stdout)
-                    if system_glibc_match:
-                        system_glibc_version = system_glibc_match.group(1)
-                        
-                        if custom_glibc_version != system_glibc_version:
-                            issue = f"GLIBC version mismatch: custom={custom_glibc_version}, system={system_glibc_version}"
-                            test_results["detected_issues"].append(issue)
-                            test_results["recommended_base_image"] = select_compatible_base_image(provided_libs, task_path)
-                            
-                            if verbose:
-                                print(f"{YELLOW}⚠️  {issue}{RESET}")
-                                print(f"{BLUE}Recommended base image: {test_results['recommended_base_image']}{RESET}")
-            except Exception:
-                pass
-    
-    # Test 1: System libraries (no custom libs) - with better error detection
-    try:
-        if verbose:
-            print(f"{BLUE}  Testing system libraries...{RESET}")
+            system_glibc_version = _system_glibc_version()
+            if system_glibc_version and custom_glibc_version != system_glibc_version:
+                issue = f"GLIBC version mismatch: custom={custom_glibc_version}, system={system_glibc_version}"
+                test_results.detected_issues.append(issue)
+                test_results.recommended_base_image = select_compatible_base_image(provided_libs, task_path)
+                
+                if verbose:
+                    print(f"{YELLOW}⚠️  {issue}{RESET}")
+                    print(f"{BLUE}Recommended base image: {test_results.recommended_base_image}{RESET}")
+    
+    # The three tests are independent and mostly wait on subprocesses, so run them concurrently.
+    # A test only counts (issues and log lines) where the sequential order would have reached it:
+    # custom libc when system libraries fail, custom linker when custom libc fails as well.
+    # All tests share one staging directory: libc and the linker are staged once, and each
+    # test works on its own copy of the binary (bin.sys, bin.libc, bin.full). The system test
+    # runs from a subdirectory without the staged libraries, so a binary already patched to
+    # load them from its own directory or the working directory cannot pass it with them.
+    with tempfile.TemporaryDirectory() as temp_dir:
+        system_dir = os.path.join(temp_dir, "system")
+        os.mkdir(system_dir)
+        staging_errors: Dict[str, Exception] = {}
+        for lib_type in ('libc', 'dynamic_linker'):
+            if lib_type in provided_libs:
+                try:
+                    _link_or_copy(task_dir / provided_libs[lib_type], Path(temp_dir) / provided_libs[lib_type])
+                except Exception as e:
+                    staging_errors[lib_type] = e
         
-        with tempfile.TemporaryDirectory() as temp_dir:
-            temp_binary = Path(temp_dir) / test_binary
-            shutil.copy2(test_binary_path, temp_binary)
-            
-            # Test if binary runs with system libraries
-            result = subprocess.run(
-                [str(temp_binary)], 
-                cwd=temp_dir,
-                capture_output=True, 
-                text=True, 
-                timeout=3,
-                input="\n"
-            )
-            
-            # Analyze the result more carefully
-            exit_code = result.returncode
-            stderr_output = result.stderr.lower()
-            
-            # Check for specific error patterns
-            segfault_indicators = [
-                exit_code == -11,  # SIGSEGV
-                'segmentation fault' in stderr_output,
-                'core dumped' in stderr_output
-            ]
-            
-            library_error_indicators = [
-                'cannot execute binary file' in stderr_output,
-                'no such file or directory' in stderr_output and 'ld-linux' in stderr_output,
-                'wrong elf class' in stderr_output,
-                'incompatible' in stderr_output
-            ]
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            system_future = executor.submit(_test_system_libs, system_dir, test_binary_path)
+            custom_libc_future = None
+            custom_linker_future = None
+            if 'libc' in provided_libs:
+                custom_libc_future = executor.submit(_test_custom_libc, temp_dir, test_binary_path, staging_errors.get('libc'))
+                if 'dynamic_linker' in provided_libs:
+                    custom_linker_future = executor.submit(_test_custom_dynamic_linker, temp_dir, test_binary_path, provided_libs,
+                                                           staging_errors.get('libc') or staging_errors.get('dynamic_linker'))
             
-            if any(segfault_indicators):
-                test_results["detected_issues"].append("Binary segfaults with system libraries")
-                if verbose:
-                    print(f"{RED}    ✗ System libraries cause segfault (exit code: {exit_code}){RESET}")
-            elif any(library_error_indicators):
-                test_results["detected_issues"].append("Binary has library compatibility issues")
-                if verbose:
-                    print(f"{RED}    ✗ System libraries have compatibility issues{RESET}")
-            else:
-                test_results["system_libs"] = True
+            for flag_name, future in (("system_libs", system_future),
+                                      ("custom_libc_only", custom_libc_future),
+                                      ("custom_dynamic_linker", custom_linker_future)):
+                if future is None:
+                    continue
+                if flag_name == "custom_libc_only" and test_results.system_libs:
+                    continue
+                if flag_name == "custom_dynamic_linker" and test_results.custom_libc_only:
+                    continue
+                works, issues, log_lines, ran = future.result()
+                tests_ran = tests_ran and ran
+                setattr(test_results, flag_name, works)
+                test_results.detected_issues.extend(issues)
                 if verbose:
-                    print(f"{GREEN}    ✓ System libraries work (exit code: {exit_code}){RESET}")
-                    
-    except subprocess.TimeoutExpired:
-        # Timeout might indicate the binary is waiting for input (which is good)
-        test_results["system_libs"] = True
-        if verbose:
-            print(f"{GREEN}    ✓ System libraries work (timed out waiting for input){RESET}")
-    except Exception as e:
-        if verbose:
-            print(f"{YELLOW}    ? System libraries test failed: {str(e)[:50]}{RESET}")
-    
-    # Test 2: Custom libc only (enhanced)
-    if 'libc' in provided_libs and not test_results["system_libs"]:
-        try:
-            if verbose:
-                print(f"{BLUE}  Testing custom libc with system dynamic linker...{RESET}")
-            
-            with tempfile.TemporaryDirectory() as temp_dir:
-                temp_binary = Path(temp_dir) / test_binary
-                temp_libc = Path(temp_dir) / provided_libs['libc']
-                
-                shutil.copy2(test_binary_path, temp_binary)
-                shutil.copy2(task_dir / provided_libs['libc'], temp_libc)
-                
-                # Try to patch the binary to use custom libc
-                patchelf_result = subprocess.run(
-                    ['patchelf', '--set-rpath', '.', str(temp_binary)], 
-                    capture_output=True, text=True, timeout=10
-                )
-                
-                if patchelf_result.returncode != 0:
-                    test_results["detected_issues"].append("patchelf failed to set rpath")
-                    if verbose:
-                        print(f"{RED}    ✗ patchelf failed: {patchelf_result.stderr}{RESET}")
-                else:
-                    # Test the patched binary
-                    result = subprocess.run(
-                        [str(temp_binary)], 
-                        cwd=temp_dir,
-                        capture_output=True, 
-                        text=True, 
-                        timeout=3,
-                        input="\n"
-                    )
-                    
-                    if result.returncode != -11:  # Not a segfault
-                        test_results["custom_libc_only"] = True
-                        if verbose:
-                            print(f"{GREEN}    ✓ Custom libc with system dynamic linker works{RESET}")
-                    else:
-                        test_results["detected_issues"].append("Custom libc with system linker still segfaults")
-                        if verbose:
-                            print(f"{RED}    ✗ Custom libc with system dynamic linker causes segfault{RESET}")
-                        
-        except subprocess.TimeoutExpired:
-            test_results["custom_libc_only"] = True
-            if verbose:
-                print(f"{GREEN}    ✓ Custom libc works (timed out waiting for input){RESET}")
-        except Exception as e:
-            test_results["detected_issues"].append(f"Custom libc test failed: {str(e)}")
-            if verbose:
-                print(f"{YELLOW}    ? Custom libc test failed: {str(e)[:50]}{RESET}")
-    
-    # Test 3: Custom dynamic linker + custom libc (enhanced)
-    if 'dynamic_linker' in provided_libs and 'libc' in provided_libs and not test_results["custom_libc_only"]:
-        try:
-            if verbose:
-                print(f"{BLUE}  Testing custom dynamic linker + custom libc...{RESET}")
-            
-            with tempfile.TemporaryDirectory() as temp_dir:
-                temp_binary = Path(temp_dir) / test_binary
-                temp_libc = Path(temp_dir) / provided_libs['libc']
-                temp_linker = Path(temp_dir) / provided_libs['dynamic_linker']
-                
-                shutil.copy2(test_binary_path, temp_binary)
-                shutil.copy2(task_dir / provided_libs['libc'], temp_libc)
-                shutil.copy2(task_dir / provided_libs['dynamic_linker'], temp_linker)
-                
-                # Patch binary to use custom interpreter and rpath
-                interpreter_result = subprocess.run(
-                    ['patchelf', '--set-interpreter', f'./{provided_libs["dynamic_linker"]}', str(temp_binary)], 
-                    capture_output=True, text=True, timeout=10
-                )
-                
-                rpath_result = subprocess.run(
-                    ['patchelf', '--set-rpath', '.', str(temp_binary)], 
-                    capture_output=True, text=True, timeout=10
-                )
-                
-                if interpreter_result.returncode != 0 or rpath_result.returncode != 0:
-                    test_results["detected_issues"].append("patchelf failed to set interpreter or rpath")
-                    if verbose:
-                        print(f"{RED}    ✗ patchelf failed to set interpreter or rpath{RESET}")
-                else:
-                    # Test the patched binary
-                    result = subprocess.run(
-                        [str(temp_binary)], 
-                        cwd=temp_dir,
-                        capture_output=True, 
-                        text=True, 
-                        timeout=3,
-                        input="\n"
-                    )
-                    
-                    if result.returncode != -11:  # Not a segfault
-                        test_results["custom_dynamic_linker"] = True
-                        if verbose:
-                            print(f"{GREEN}    ✓ Custom dynamic linker + custom libc works{RESET}")
-                    else:
-                        test_results["detected_issues"].append("Custom dynamic linker + custom libc still segfaults")
-                        if verbose:
-                            print(f"{RED}    ✗ Custom dynamic linker + custom libc causes segfault{RESET}")
-                        
-        except subprocess.TimeoutExpired:
-            test_results["custom_dynamic_linker"] = True
-            if verbose:
-                print(f"{GREEN}    ✓ Custom dynamic linker + custom libc works (timed out waiting for input){RESET}")
-        except Exception as e:
-            test_results["detected_issues"].append(f"Custom dynamic linker test failed: {str(e)}")
-            if verbose:
-                print(f"{YELLOW}    ? Custom dynamic linker test failed: {str(e)[:50]}{RESET}")
+                    for line in log_lines:
+                        print(line)
     
     # Determine the working configuration and generate appropriate commands
-    if test_results["system_libs"]:
-        test_results["working_config"] = "system_libs"
-        test_results["commands"] = []
-        test_results["reason"] = "Binary works with system libraries, no patchelf needed"
+    if test_results.system_libs:
+        test_results.working_config = "system_libs"
+        test_results.commands = []
+        test_results.reason = "Binary works with system libraries, no patchelf needed"
         
-    elif test_results["custom_libc_only"]:
-        test_results["working_config"] = "custom_libc_only"
-        test_results["commands"] = [
+    elif test_results.custom_libc_only:
+        test_results.working_config = "custom_libc_only"
+        test_results.commands = [
             "# Set library path for custom libc",
             f"    patchelf --set-rpath . /challenge/{test_binary}"
         ]
-        test_results["reason"] = "Binary works with custom libc and system dynamic linker"
+        test_results.reason = "Binary works with custom libc and system dynamic linker"
         
-    elif test_results["custom_dynamic_linker"]:
-        test_results["working_config"] = "custom_dynamic_linker"
-        test_results["commands"] = [
+    elif test_results.custom_dynamic_linker:
+        test_results.working_config = "custom_dynamic_linker"
+        test_results.commands = [
             "# Set custom interpreter and library path",
-            f"    patchelf --set-interpreter ./{provided_libs['dynamic_linker']} /challenge/{test_binary}",
-            f"    patchelf --set-rpath . /challenge/{test_binary}"
+            f"    patchelf --set-interpreter ./{provided_libs['dynamic_linker']} --set-rpath . /challenge/{test_binary}"
         ]
-        test_results["reason"] = "Binary requires both custom dynamic linker and custom libc"
+        test_results.reason = "Binary requires both custom dynamic linker and custom libc"
         
     else:
-        test_results["working_config"] = "unknown"
-        test_results["commands"] = []
-        test_results["reason"] = "No working library configuration found - all tests failed"
+        test_results.working_config = "unknown"
+        test_results.commands = []
+        test_results.reason = "No working library configuration found - all tests failed"
         
         # Suggest fallback strategies
         if provided_libs:
-            test_results["detected_issues"].append("Consider using compatible base image")
-            test_results["detected_issues"].append("Consider using system dynamic linker with LD_LIBRARY_PATH")
+            test_results.detected_issues.append("Consider using compatible base image")
+            test_results.detected_issues.append("Consider using system dynamic linker with LD_LIBRARY_PATH")
     
     if verbose:
-        print(f"{BLUE}  Result: {test_results['working_config']} - {test_results['reason']}{RESET}")
-        if test_results["detected_issues"]:
-            print(f"{YELLOW}  Issues detected: {test_results['detected_issues']}{RESET}")
+        print(f"{BLUE}  Result: {test_results.working_config} - {test_results.reason}{RESET}")
+        if test_results.detected_issues:
+            print(f"{YELLOW}  Issues detected: {test_results.detected_issues}{RESET}")
     
-    return test_results
+    return test_results, tests_ran
 
 
 def generate_library_fix_commands(provided_libs: Dict[str, str], binary_files: List[str], task_path: str = "", verbose: bool = False) -> List[str]:
@@ -479,75 +742,236 @@ def generate_library_fix_commands(provided_libs: Dict[str, str], binary_files: L
     if task_path:
         test_results = test_binary_library_configurations(task_path, binary_files, provided_libs, verbose)
         
-        if test_results["working_config"] == "system_libs":
+        if test_results.working_config == "system_libs":
             # No patchelf needed - system libraries work
             return []
-        elif test_results["working_config"] in ["custom_libc_only", "custom_dynamic_linker"]:
+        elif test_results.working_config in ["custom_libc_only", "custom_dynamic_linker"]:
             # Use the tested commands that actually work
-            return test_results["commands"]
+            return test_results.commands
         else:
             if verbose:
                 print(f"{YELLOW}Warning: No working library configuration found, falling back to heuristic approach{RESET}")
     
     # Fallback to original heuristic approach if testing fails or no task_path provided
+    # (patchelf takes several files per call, so each configuration is a single command)
+    challenge_binaries = " ".join(f"/challenge/{binary_file}" for binary_file in binary_files)
     if 'dynamic_linker' in provided_libs:
         dynamic_linker = provided_libs['dynamic_linker']
         
         commands.append("# Fix interpreter and library paths for provided libraries")
         
-        for binary_file in binary_files:
-            # Set the correct interpreter
-            commands.append(f"    patchelf --set-interpreter ./{dynamic_linker} /challenge/{binary_file}")
-            
-            # Set the rpath to current directory so it finds provided libraries
-            commands.append(f"    patchelf --set-rpath . /challenge/{binary_file}")
+        # Set the correct interpreter, and the rpath to current directory so it finds
+        # provided libraries, for all binaries in one patchelf run
+        commands.append(f"    patchelf --set-interpreter ./{dynamic_linker} --set-rpath . {challenge_binaries}")
     
     # If we have custom libc but no custom dynamic linker, just set rpath
     elif 'libc' in provided_libs:
         commands.append("# Set library path for provided libraries")
-        
-        for binary_file in binary_files:
-            commands.append(f"    patchelf --set-rpath . /challenge/{binary_file}")
+        commands.append(f"    patchelf --set-rpath . {challenge_binaries}")
     
     return commands
 
 
+# Known problematic shebang patterns
+_PROBLEMATIC_SHEBANG_PATTERNS = (
+    '/opt/pwn.college/python',
+    '/opt/pwn.college/node',
+    '/opt/pwn.college/',
+    '/usr/local/bin/python',  # might not exist in some containers
+    '/usr/local/bin/node',    # might not exist in some containers
+)
+_PROBLEMATIC_SHEBANG_RE = re.compile('|'.join(map(re.escape, _PROBLEMATIC_SHEBANG_PATTERNS)))
+
+# Only files below this size are checked for problematic shebangs
+_SHEBANG_SCAN_MAX_SIZE = 1024 * 1024  # Max 1MB
+
+_PYTHON_EXTENSIONS = ('.py',)
+_NODE_EXTENSIONS = ('.js', '.mjs', '.ts')
+_NODE_PROJECT_FILES = frozenset(('package.json', 'package-lock.json', '.nvmrc', 'yarn.lock'))
+
+
+def _has_python_file_name(available_files: List[str]) -> bool:
+    """Whether any file name alone marks the task as Python (no filesystem access)."""
+    return any(file_path.lower().endswith(_PYTHON_EXTENSIONS) for file_path in available_files or [])
+
+
+def _has_node_file_name(available_files: List[str]) -> bool:
+    """Whether any file name alone marks the task as Node.js (no filesystem access)."""
+    for file_path in available_files or []:
+        file_name = file_path.lower()
+        if file_name.endswith(_NODE_EXTENSIONS) or file_name in _NODE_PROJECT_FILES:
+            return True
+    return False
+
+
+# Files with these suffixes are never scripts, so their shebang line is not read at all
+_NON_SCRIPT_SUFFIXES = ('.so', '.so.6', '.so.2', '.bin', '.elf', '.zip', '.tar', '.gz',
+                        '.png', '.jpg', '.pdf', '.o', '.a')
+
+
+def _read_shebang_line(full_path: Path) -> str:
+    """
+    First line of a file as text-mode readline().strip() would give it (UTF-8, errors ignored),
+    or "" if the file does not start with b'#!'. Only two bytes are read from other files.
+    """
+    with open(full_path, 'rb') as f:
+        if f.read(2) != b'#!':
+            return ""
+        raw = b'#!' + f.readline(_SHEBANG_SCAN_MAX_SIZE - 2)
+    # Universal newlines: a lone carriage return also ends the line
+    return raw.decode('utf-8', errors='ignore').split('\r', 1)[0].strip()
+
+
+_TASK_SCAN_SERIAL_LIMIT = 8
+_TASK_SCAN_MAX_THREADS = 32
+
+
+def _scan_task_file(task_dir: Path, file_path: str, check_content: bool = True) -> Tuple[bool, bool, Optional[str]]:
+    """
+    Check one task file for scan_task_files.
+    Returns (looks_like_python, looks_like_node, problematic_shebang_or_None).
+    """
+    full_path = task_dir / file_path
+    python_hit = False
+    node_hit = False
+    problematic_shebang = None
+    
+    # Check by content analysis
+    if check_content:
+        content_type = analyze_executable_content(full_path)
+        python_hit = content_type == 'python'
+        node_hit = content_type == 'node'
+    
+    # Binary formats are never scripts; skip opening them at all
+    if not file_path.lower().endswith(_NON_SCRIPT_SUFFIXES):
+        try:
+            st = full_path.stat()
+            if stat.S_ISREG(st.st_mode):
+                first_line = _read_shebang_line(full_path)
+                if first_line.startswith('#!'):
+                    # Check for Python / Node.js shebang
+                    shebang = first_line.lower()
+                    python_hit = python_hit or 'python' in shebang
+                    node_hit = node_hit or 'node' in shebang
+                    
+                    # Check if this shebang is problematic (only text files that could have shebangs)
+                    if st.st_size < _SHEBANG_SCAN_MAX_SIZE and _PROBLEMATIC_SHEBANG_RE.search(first_line):
+                        problematic_shebang = first_line
+        except Exception:
+            # Skip files that can't be read as text
+            pass
+    
+    return python_hit, node_hit, problematic_shebang
+
+
+def scan_task_files(task_path: str, available_files: List[str]) -> Dict[str, Any]:
+    """
+    Look at every task file once (one stat, one first-line read) and collect what
+    detect_python_files, detect_node_files and detect_problematic_shebangs report.
+    Returns dict with 'has_python_files', 'has_node_files' and 'problematic_shebangs'.
+    """
+    # Check by file extension first (and for package.json or other Node.js specific files),
+    # so content analysis only runs while an answer is still unknown
+    has_python_files = _has_python_file_name(available_files)
+    has_node_files = _has_node_file_name(available_files)
+    task_dir = Path(task_path)
+    files = list(available_files or [])
+    
+    check_content = not has_python_files or not has_node_files
+    scan = partial(_scan_task_file, task_dir, check_content=check_content)
+    
+    # The per-file checks are independent and I/O bound, so larger tasks read files concurrently
+    if len(files) > _TASK_SCAN_SERIAL_LIMIT:
+        with ThreadPoolExecutor(max_workers=min(_TASK_SCAN_MAX_THREADS, (os.cpu_count() or 1) * 4, len(files))) as executor:
+            results = list(executor.map(scan, files))
+    else:
+        results = [scan(file_path) for file_path in files]
+    
+    problematic_shebangs = []
+    for file_path, (python_hit, node_hit, problematic_shebang) in zip(files, results):
+        has_python_files = has_python_files or python_hit
+        has_node_files = has_node_files or node_hit
+        if problematic_shebang is not None:
+            problematic_shebangs.append((file_path, problematic_shebang))
+    
+    return {
+        "has_python_files": has_python_files,
+        "has_node_files": has_node_files,
+        "problematic_shebangs": problematic_shebangs,
+    }
+
+
 def detect_problematic_shebangs(task_path: str, available_files: List[str]) -> List[tuple[str, str]]:
     """
     Detect files with problematic shebangs that need to be fixed.
     Returns list of (file_path, problematic_shebang) tuples.
     """
-    problematic_shebangs = []
+    return scan_task_files(task_path, available_files)["problematic_shebangs"]
+
+
+# Common shebang fixes
+_SHEBANG_FIXES = {
+    '/opt/pwn.college/python': '/usr/bin/python3',
+    '/opt/pwn.college/node': '/usr/bin/node',
+    '/usr/local/bin/python': '/usr/bin/python3',
+    '/usr/local/bin/node': '/usr/bin/node',
+}
+
+
+def _shebang_replacement(original_shebang: str) -> Optional[str]:
+    """Standard shebang to use instead of a problematic one, or None if there is no known fix."""
+    for problematic_pattern in _SHEBANG_FIXES:
+        if problematic_pattern in original_shebang:
+            # More specific replacements
+            if 'python' in original_shebang.lower():
+                return "#!/usr/bin/env python3"
+            return "#!/usr/bin/env node"
+    return None
+
+
+def apply_shebang_fixes_locally(task_path: str, problematic_shebangs: List[tuple[str, str]]) -> List[str]:
+    """
+    Rewrite problematic shebangs in the task files themselves, so the Dockerfile's COPY
+    picks up fixed files and no sed has to run at image build time.
+    Each file is rewritten through a temporary file and os.replace, keeping its mode.
+    Returns the file paths that were fixed; the rest still need generate_shebang_fix_command.
+    """
+    fixed_files = []
     task_dir = Path(task_path)
     
-    # Known problematic shebang patterns
-    problematic_patterns = [
-        '/opt/pwn.college/python',
-        '/opt/pwn.college/node',
-        '/opt/pwn.college/',
-        '/usr/local/bin/python',  # might not exist in some containers
-        '/usr/local/bin/node',    # might not exist in some containers
-    ]
-    
-    for file_path in available_files:
+    for file_path, original_shebang in problematic_shebangs:
+        replacement_shebang = _shebang_replacement(original_shebang)
+        if not replacement_shebang:
+            continue
+        
         full_path = task_dir / file_path
+        tmp_path = None
         try:
-            # Only check text files that could have shebangs
-            if full_path.is_file() and full_path.stat().st_size < 1024 * 1024:  # Max 1MB
-                with open(full_path, 'r', encoding='utf-8', errors='ignore') as f:
-                    first_line = f.readline().strip()
-                    
-                    if first_line.startswith('#!'):
-                        # Check if this shebang is problematic
-                        for problematic_pattern in problematic_patterns:
-                            if problematic_pattern in first_line:
-                                problematic_shebangs.append((file_path, first_line))
-                                break
-        except Exception:
-            # Skip files that can't be read as text
-            continue
-    
-    return problematic_shebangs
+            with open(full_path, 'rb') as src:
+                first_line = src.readline()
+                original_bytes = original_shebang.encode('utf-8')
+                if not first_line.startswith(original_bytes):
+                    continue  # The file changed since it was scanned
+                
+                fd, tmp_path = tempfile.mkstemp(dir=full_path.parent, prefix=f".{full_path.name}.", suffix=".tmp")
+                with os.fdopen(fd, 'wb') as dst:
+                    # Like sed '1s|^original|replacement|': keep the rest of the first line as is
+                    dst.write(replacement_shebang.encode('utf-8') + first_line[len(original_bytes):])
+                    shutil.copyfileobj(src, dst)
+            shutil.copymode(full_path, tmp_path)
+            os.replace(tmp_path, full_path)
+            tmp_path = None
+            fixed_files.append(file_path)
+        except Exception as e:
+            print(f"{YELLOW}Warning: Could not fix shebang in {file_path}: {e}{RESET}")
+        finally:
+            if tmp_path is not None:
+                try:
+                    os.unlink(tmp_path)
+                except OSError:
+                    pass
+    
+    return fixed_files
 
 
 def generate_shebang_fix_command(problematic_shebangs: List[tuple[str, str]]) -> str:
@@ -558,30 +982,12 @@ def generate_shebang_fix_command(problematic_shebangs: List[tuple[str, str]]) ->
     if not problematic_shebangs:
         return ""
 
-    # Create a mapping of common shebang fixes
-    shebang_fixes = {
-        '/opt/pwn.college/python': '/usr/bin/python3',
-        '/opt/pwn.college/node': '/usr/bin/node',
-        '/usr/local/bin/python': '/usr/bin/python3',
-        '/usr/local/bin/node': '/usr/bin/node',
-    }
-
     fix_commands = []
     fix_commands.append("# Fix problematic shebangs in challenge files")
 
     for file_path, original_shebang in problematic_shebangs:
         # Determine the correct replacement
-        replacement_shebang = None
-
-        for problematic_pattern, standard_replacement in shebang_fixes.items():
-            if problematic_pattern in original_shebang:
-                replacement_shebang = f"#!/usr/bin/env python3" if 'python' in original_shebang else f"#!/usr/bin/env node"
-                # More specific replacements
-                if 'python' in original_shebang.lower():
-                    replacement_shebang = "#!/usr/bin/env python3"
-                elif 'node' in original_shebang.lower():
-                    replacement_shebang = "#!/usr/bin/env node"
-                break
+        replacement_shebang = _shebang_replacement(original_shebang)
 
         if replacement_shebang:
             # Use sed to replace the first line (shebang) only
@@ -607,69 +1013,9 @@ def detect_python_files(task_path: str, available_files: List[str]) -> bool:
     Detect if there are Python files in the task.
     Returns True if Python files are found, False otherwise.
     """
-    if not available_files:
-        return False
-        
-    task_dir = Path(task_path)
-    
-    for file_path in available_files:
-        full_path = task_dir / file_path
-        
-        # Check by file extension first
-        if file_path.lower().endswith('.py'):
-            return True
-            
-        # Check by content analysis
-        if analyze_executable_content(full_path) == 'python':
-            return True
-            
-        # Check for Python shebang
-        try:
-            if full_path.exists() and full_path.is_file():
-                with open(full_path, 'r', encoding='utf-8', errors='ignore') as f:
-                    first_line = f.readline().strip()
-                    if first_line.startswith('#!') and 'python' in first_line.lower():
-                        return True
-        except Exception:
-            continue
-            
-    return False
-
-    # Create a mapping of common shebang fixes
-    shebang_fixes = {
-        '/opt/pwn.college/python': '/usr/bin/python3',
-        '/opt/pwn.college/node': '/usr/bin/node',
-        '/usr/local/bin/python': '/usr/bin/python3',
-        '/usr/local/bin/node': '/usr/bin/node',
-    }
-    
-    fix_commands = []
-    fix_commands.append("# Fix problematic shebangs in challenge files")
-    
-    for file_path, original_shebang in problematic_shebangs:
-        # Determine the correct replacement
-        replacement_shebang = None
-        
-        for problematic_pattern, standard_replacement in shebang_fixes.items():
-            if problematic_pattern in original_shebang:
-                replacement_shebang = f"#!/usr/bin/env python3" if 'python' in original_shebang else f"#!/usr/bin/env node"
-                # More specific replacements
-                if 'python' in original_shebang.lower():
-                    replacement_shebang = "#!/usr/bin/env python3"
-                elif 'node' in original_shebang.lower():
-                    replacement_shebang = "#!/usr/bin/env node"
-                break
-        
-        if replacement_shebang:
-            # Use sed to replace the first line (shebang) only
-            escaped_original = original_shebang.replace('/', r'\/')
-            escaped_replacement = replacement_shebang.replace('/', r'\/')
-            fix_commands.append(f"    sed -i '1s|^{escaped_original}|{escaped_replacement}|' /challenge/{file_path}")
-    
-    if len(fix_commands) > 1:  # More than just the comment
-        return "RUN " + " && \\\n".join(fix_commands)
-    
-    return ""
+    if _has_python_file_name(available_files):
+        return True
+    return scan_task_files(task_path, available_files)["has_python_files"]
 
 
 def detect_node_files(task_path: str, available_files: List[str]) -> bool:
@@ -677,37 +1023,20 @@ def detect_node_files(task_path: str, available_files: List[str]) -> bool:
     Detect if there are Node.js files in the task.
     Returns True if Node.js files are found, False otherwise.
     """
-    if not available_files:
-        return False
-        
-    task_dir = Path(task_path)
-    
-    for file_path in available_files:
-        full_path = task_dir / file_path
-        
-        # Check by file extension first
-        if file_path.lower().endswith(('.js', '.mjs', '.ts')):
-            return True
-            
-        # Check for package.json or other Node.js specific files
-        if file_path.lower() in ['package.json', 'package-lock.json', '.nvmrc', 'yarn.lock']:
-            return True
-            
-        # Check by content analysis
-        if analyze_executable_content(full_path) == 'node':
-            return True
-            
-        # Check for Node.js shebang
-        try:
-            if full_path.exists() and full_path.is_file():
-                with open(full_path, 'r', encoding='utf-8', errors='ignore') as f:
-                    first_line = f.readline().strip()
-                    if first_line.startswith('#!') and ('node' in first_line.lower() or 'nodejs' in first_line.lower()):
-                        return True
-        except Exception:
-            continue
-            
-    return False
+    if _has_node_file_name(available_files):
+        return True
+    return scan_task_files(task_path, available_files)["has_node_files"]
+
+
+# Standard interpreter paths that should be OK
+_STANDARD_INTERPRETERS = frozenset({
+    '/lib/ld-linux.so.2',           # 32-bit
+    '/lib32/ld-linux.so.2',         # 32-bit alternative
+    '/lib64/ld-linux-x86-64.so.2', # 64-bit
+    '/lib/ld-linux-x86-64.so.2',   # 64-bit alternative
+})
+# Interpreter locations that won't exist in the container
+_PROBLEMATIC_INTERPRETER_DIRS = ('/nix/store/', '/opt/pwn.college/', '/usr/local/')
 
 
 def detect_custom_interpreter_paths(task_path: str, available_files: List[str], verbose: bool = False) -> Dict[str, str]:
@@ -716,18 +1045,11 @@ def detect_custom_interpreter_paths(task_path: str, available_files: List[str],
     Returns dict mapping binary_path -> custom_interpreter_path.
     """
     custom_interpreters = {}
-    task_dir = Path(task_path)
-    
-    # Standard interpreter paths that should be OK
-    standard_interpreters = {
-        '/lib/ld-linux.so.2',           # 32-bit
-        '/lib32/ld-linux.so.2',         # 32-bit alternative
-        '/lib64/ld-linux-x86-64.so.2', # 64-bit
-        '/lib/ld-linux-x86-64.so.2',   # 64-bit alternative
-    }
+    # Plain string joins in the loop; both readers below take any path-like
+    task_dir = os.fspath(Path(task_path))
     
     for file_path in available_files:
-        full_path = task_dir / file_path
+        full_path = os.path.join(task_dir, file_path)
         
         # Only check binary files
         try:
@@ -735,27 +1057,15 @@ def detect_custom_interpreter_paths(task_path: str, available_files: List[str],
             if content_type != 'binary':
                 continue
                 
-            # Use readelf to check interpreter
-            result = subprocess.run(['readelf', '-l', str(full_path)], 
-                                  capture_output=True, text=True, timeout=10)
+            # Read the interpreter straight from the ELF program headers
+            interpreter_path = read_elf_interpreter(full_path)
             
-            if result.returncode == 0:
-                # Look for INTERP section in readelf output
-                for line in result.stdout.split('\n'):
-                    if 'INTERP' in line:
-                        # Extract interpreter path from the line
-                        # Format: "      [Requesting program interpreter: /path/to/interpreter]"
-                        if 'Requesting program interpreter:' in line:
-                            interpreter_path = line.split('Requesting program interpreter:')[1].strip().rstrip(']')
-                            
-                            if interpreter_path not in standard_interpreters:
-                                # Check if the interpreter contains paths that won't exist in container
-                                problematic_patterns = ['/nix/store/', '/opt/pwn.college/', '/usr/local/']
-                                if any(pattern in interpreter_path for pattern in problematic_patterns):
-                                    custom_interpreters[file_path] = interpreter_path
-                                    if verbose:
-                                        print(f"{YELLOW}Found custom interpreter: {file_path} -> {interpreter_path}{RESET}")
-                        break
+            if interpreter_path and interpreter_path not in _STANDARD_INTERPRETERS:
+                # Check if the interpreter contains paths that won't exist in container
+                if any(pattern in interpreter_path for pattern in _PROBLEMATIC_INTERPRETER_DIRS):
+                    custom_interpreters[file_path] = interpreter_path
+                    if verbose:
+                        print(f"{YELLOW}Found custom interpreter: {file_path} -> {interpreter_path}{RESET}")
                         
         except Exception as e:
             # Skip files that can't be analyzed
@@ -791,15 +1101,9 @@ def generate_interpreter_fix_commands(custom_interpreters: Dict[str, str], archi
     return commands
 
 
-def get_category_specific_guidelines(category: str, task_tags: List[str]) -> str:
-    """Generate category-specific guidelines for Dockerfile creation."""
-    
-    category_lower = category.lower() if category else ""
-    tags_lower = [tag.lower() for tag in task_tags]
-    
-    # Determine category from various sources
-    if category_lower == "web" or any("web" in tag for tag in tags_lower):
-        return """
+# Dockerfile guidelines per challenge category, in the order categories are matched
+_CATEGORY_GUIDELINES = {
+    'web': """
 WEB CHALLENGES:
 - Install web server (apache2, nginx, or built-in server for frameworks)
 - Install appropriate language runtime (php, python3, node.js, etc.)
@@ -809,49 +1113,40 @@ WEB CHALLENGES:
 - Expose port 80 or 8080 for HTTP access
 - Use COPY for static files, ensure proper permissions
 - Example: COPY *.php /var/www/html/ && chmod 644 /var/www/html/*.php
-- Start web server with CMD ["apache2ctl", "-D", "FOREGROUND"] or similar"""
-        
-    elif category_lower == "pwn" or any("pwn" in tag for tag in tags_lower):
-        return """
+- Start web server with CMD ["apache2ctl", "-D", "FOREGROUND"] or similar""",
+    'pwn': """
 PWN CHALLENGES:
 - Install socat for network service hosting.
 - Follow the general guidelines for hosting executables using a `run.sh` wrapper for maximum stability.
 - Expose port 1337 (standard for pwn challenges).
-- May need additional libraries for binary execution, such as libc6:i386 for 32-bit binaries."""
-        
-    elif category_lower == "crypto" or any("crypto" in tag for tag in tags_lower):
-    
-        return """
+- May need additional libraries for binary execution, such as libc6:i386 for 32-bit binaries.""",
+    'crypto': """
 CRYPTO CHALLENGES:
 - Copy Python scripts to /challenge/ directory
 - Install socat if hosting a crypto service
 - Expose appropriate port (often 1337)
 - Use CMD to run the crypto service
 - Example: CMD ["python3", "/challenge/crypto_server.py"]
-- Consider installing specific versions of crypto libraries if needed"""
-        
-    elif category_lower == "rev" or any("rev" in tag for tag in tags_lower):
-        return """
+- Consider installing specific versions of crypto libraries if needed""",
+    'rev': """
 REVERSE ENGINEERING CHALLENGES:
 - Copy binary files to /challenge/ directory
 - Set executable permissions for binaries
 - May need specific libraries or runtime environments
 - If hosting a service, use socat with appropriate port
 - Example: COPY binary /challenge/ && chmod +x /challenge/binary
-- Consider if challenge needs to run as service or just provide downloadable binary"""
-        
-    elif category_lower == "forensics" or any("forensics" in tag for tag in tags_lower):
-        return """
+- Consider if challenge needs to run as service or just provide downloadable binary""",
+    'forensics': """
 FORENSICS CHALLENGES:
 - Copy evidence files to appropriate directory
 - Install analysis tools if challenge provides online analysis
 - May not need network service - could be file download only
 - If hosting service, use appropriate web server
 - Example: COPY evidence.* /challenge/
-- Consider file integrity and proper permissions"""
-        
-    else:  # misc or unknown
-        return """
+- Consider file integrity and proper permissions""",
+}
+
+_MISC_GUIDELINES = """
 MISCELLANEOUS CHALLENGES:
 - Analyze available files to determine service type
 - Install appropriate runtime (python3 with python-is-python3, node.js, etc.) based on file types
@@ -861,8 +1156,208 @@ MISCELLANEOUS CHALLENGES:
 - Use socat for simple TCP services or appropriate server for web-based challenges"""
 
 
-def get_archive_contents(archive_path: Path) -> str:
-    """Get contents of archive files (zip, tar, etc.) for analysis."""
+def get_category_specific_guidelines(category: str, task_tags: List[str]) -> str:
+    """Generate category-specific guidelines for Dockerfile creation."""
+    
+    category_lower = category.lower() if category else ""
+    # Lowercase the tags once; the newline keeps a match from spanning two tags
+    tags_lower = "\n".join(task_tags).lower()
+    
+    # Determine category from various sources
+    for category_name, guidelines in _CATEGORY_GUIDELINES.items():
+        if category_lower == category_name or category_name in tags_lower:
+            return guidelines
+    
+    return _MISC_GUIDELINES  # misc or unknown
+
+
+def _name_suffix(file_name: str) -> str:
+    """Last extension of a (lowercased) file name including the dot, e.g. '.gz' for 'a.tar.gz'; '' if none."""
+    dot = file_name.rfind('.')
+    return file_name[dot:] if dot >= 0 else ''
+
+
+def _categories_by_suffix(*categories: Tuple[str, Tuple[str, ...]]) -> Dict[str, str]:
+    """Suffix -> category map; the first category listing a suffix wins, like an if/elif ladder."""
+    mapping: Dict[str, str] = {}
+    for category, suffixes in categories:
+        for suffix in suffixes:
+            mapping.setdefault(suffix, category)
+    return mapping
+
+
+# How get_archive_contents groups archive members
+_ARCHIVE_ENTRY_CATEGORIES = _categories_by_suffix(
+    ('source_code', ('.py', '.js', '.php', '.rb', '.pl', '.sh', '.c', '.cpp', '.java')),
+    ('web_files', ('.html', '.htm', '.css', '.js')),
+    ('executables', ('.exe', '.bin', '.elf')),
+    ('documents', ('.txt', '.md', '.pdf', '.doc')),
+    ('images', ('.png', '.jpg', '.jpeg', '.gif', '.bmp')),
+    ('nested_archives', ('.zip', '.tar', '.gz')),
+)
+
+# How get_enhanced_file_analysis files task files that content analysis did not place
+_TASK_FILE_KINDS = _categories_by_suffix(
+    ('script', ('.py', '.js', '.php', '.rb', '.pl', '.sh')),
+    ('web', ('.html', '.htm', '.css', '.js', '.php')),
+    ('config', ('.conf', '.cfg', '.ini', '.yml', '.yaml', '.json')),
+    ('library', ('.so', '.dll', '.a')),
+    ('archive', ('.zip', '.tar', '.tgz', '.tbz2', '.txz', '.rar', '.7z')),
+)
+# Archive suffixes whose last part (.gz, .bz2, .xz) alone does not mark an archive
+_COMPOUND_ARCHIVE_SUFFIXES = ('.tar.gz', '.tar.bz2', '.tar.xz')
+
+
+def _task_file_kind(file_name: str) -> Optional[str]:
+    """'script', 'web', 'config', 'library', 'archive' or None for a lowercased task file name."""
+    kind = _TASK_FILE_KINDS.get(_name_suffix(file_name))
+    if kind in ('script', 'web', 'config', 'library'):
+        return kind
+    # Dynamic linkers are libraries whatever their suffix
+    if 'ld-linux' in file_name:
+        return 'library'
+    if kind is None and file_name.endswith(_COMPOUND_ARCHIVE_SUFFIXES):
+        return 'archive'
+    return kind
+
+
+_TAR_SUFFIXES = ('.tar', '.tar.gz', '.tgz', '.tar.bz2', '.tbz2', '.tar.xz', '.txz')
+
+
+def _list_archive_files(archive_path: Path) -> List[str]:
+    """Names of the regular files in an archive of any supported format, read with libarchive."""
+    with libarchive.file_reader(str(archive_path)) as archive:
+        return [entry.pathname for entry in archive if entry.isfile]
+
+
+def list_7z_archives(archive_paths: List[Path]) -> Dict[Path, List[bytes]]:
+    """
+    List several 7z/rar archives with a single 7z run (archive names from a list file)
+    instead of one process per archive. Returns each archive's share of the `7z l`
+    output as raw lines, ready for get_archive_contents; an empty dict when the batch run
+    is unavailable or any archive fails, so callers fall back to per-archive listing.
+    """
+    if len(archive_paths) < 2:
+        return {}
+    
+    list_file = None
+    try:
+        with tempfile.NamedTemporaryFile('w', encoding='utf-8', suffix='.lst', delete=False) as f:
+            list_file = f.name
+            f.write('\n'.join(str(archive_path) for archive_path in archive_paths) + '\n')
+        result = subprocess.run(['7z', 'l', '-scsUTF-8', '-an', f'-ai@{list_file}'],
+                              capture_output=True, timeout=10 * len(archive_paths))
+    except Exception:
+        return {}
+    finally:
+        if list_file:
+            try:
+                os.unlink(list_file)
+            except OSError:
+                pass
+    
+    if result.returncode != 0:
+        return {}
+    
+    # Each archive's listing starts with "Listing archive: <path>"; the run ends with a
+    # summary over all archives ("Archives: N", ...). Only the archive paths are decoded here.
+    sections: Dict[str, List[bytes]] = {}
+    current = None
+    for line in result.stdout.splitlines():
+        if line.startswith(b'Listing archive: '):
+            current = sections.setdefault(os.fsdecode(line[len(b'Listing archive: '):].strip()), [])
+        elif line.startswith(b'Archives:'):
+            current = None
+        if current is not None:
+            current.append(line)
+    
+    listings = {archive_path: sections.get(str(archive_path)) for archive_path in archive_paths}
+    if any(lines is None for lines in listings.values()):
+        return {}
+    return listings
+
+
+# Leading signatures of compressed tars; an uncompressed tar has "ustar" at offset 257 instead
+_COMPRESSED_TAR_MAGICS = (b'\x1f\x8b', b'BZh', b'\xfd7zXZ\x00')
+_TAR_MAGIC_OFFSET = 257
+# What 7z is asked to list: 7z and rar archives, plus zips and tars under those names
+_7Z_LISTABLE_MAGICS = (b"7z\xbc\xaf'\x1c", b'Rar!\x1a\x07', b'PK\x03\x04', b'PK\x05\x06') + _COMPRESSED_TAR_MAGICS
+
+
+def _sniff_archive_header(archive_path: Path) -> bytes:
+    """Read enough of a file to check the archive signatures above."""
+    with open(archive_path, 'rb') as f:
+        return f.read(_TAR_MAGIC_OFFSET + 5)
+
+
+def _looks_like_tar(header: bytes) -> bool:
+    return header.startswith(_COMPRESSED_TAR_MAGICS) or header[_TAR_MAGIC_OFFSET:_TAR_MAGIC_OFFSET + 5] == b'ustar'
+
+
+def _parse_7z_listing(lines: List[bytes]) -> List[str]:
+    """File names from the table in raw `7z l` output lines; only the name column is decoded."""
+    contents = []
+    in_file_list = False
+    previous = b''
+    for line in lines:
+        if b'---' in line and b'Name' in previous:
+            in_file_list = True
+        elif b'---' in line and in_file_list:
+            break
+        elif in_file_list and line.strip():
+            # Extract filename from 7z output format: date, time, attributes, size,
+            # compressed size, then the name (kept as is, inner spaces included)
+            parts = line.split(None, 5)
+            if len(parts) >= 6 and not parts[2].startswith(b'D'):  # Skip directories
+                filename = parts[5].decode('utf-8', errors='replace')
+                if filename and not filename.endswith('/'):
+                    contents.append(filename)
+        previous = line
+    return contents
+
+
+# get_archive_contents summaries, keyed by _archive_cache_key; the oldest entry goes once full
+_ARCHIVE_CONTENTS_CACHE: Dict[tuple, str] = {}
+_ARCHIVE_CONTENTS_CACHE_SIZE = 512
+# Summaries that depend on the environment (7z missing or timing out) rather than the archive
+_UNCACHED_ARCHIVE_RESULTS = ("cannot analyze archive", "error analyzing archive")
+
+
+def _archive_cache_key(archive_path: Path) -> Optional[tuple]:
+    """(path, st_dev, st_ino, st_size, st_mtime_ns) of a regular file, or None."""
+    try:
+        st = os.stat(archive_path)
+    except (OSError, ValueError):
+        return None
+    if not stat.S_ISREG(st.st_mode):
+        return None
+    return (os.fspath(archive_path), st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns)
+
+
+def get_archive_contents(archive_path: Path, listing: Optional[List[bytes]] = None) -> str:
+    """
+    Get contents of archive files (zip, tar, etc.) for analysis.
+    For 7z/rar archives, `listing` may carry this archive's `7z l` output lines from
+    list_7z_archives, which saves running 7z again.
+    """
+    # The same task is analyzed again for every Dockerfile generation attempt
+    key = _archive_cache_key(archive_path)
+    if key is not None and key in _ARCHIVE_CONTENTS_CACHE:
+        return _ARCHIVE_CONTENTS_CACHE[key]
+    
+    result = _get_archive_contents_uncached(archive_path, listing)
+    if key is not None and not result.startswith(_UNCACHED_ARCHIVE_RESULTS):
+        if len(_ARCHIVE_CONTENTS_CACHE) >= _ARCHIVE_CONTENTS_CACHE_SIZE:
+            try:
+                _ARCHIVE_CONTENTS_CACHE.pop(next(iter(_ARCHIVE_CONTENTS_CACHE)), None)
+            except (RuntimeError, StopIteration):
+                pass  # Another classification thread changed the cache meanwhile
+        _ARCHIVE_CONTENTS_CACHE[key] = result
+    return result
+
+
+def _get_archive_contents_uncached(archive_path: Path, listing: Optional[List[bytes]]) -> str:
+    """get_archive_contents without the summary cache."""
     try:
         if not archive_path.exists():
             return "archive file not found"
@@ -870,47 +1365,60 @@ def get_archive_contents(archive_path: Path) -> str:
         archive_name = archive_path.name.lower()
         contents = []
         
+        # Misnamed files fail the signature check without opening them as archives (or running 7z).
+        # Zips are not sniffed: they are found from their end record, so prefixed (self-extracting,
+        # polyglot) zips are valid.
+        if archive_name.endswith(_TAR_SUFFIXES + ('.7z', '.rar')):
+            header = _sniff_archive_header(archive_path)
+            if archive_name.endswith(_TAR_SUFFIXES):
+                if not _looks_like_tar(header):
+                    return "corrupted tar file"
+            elif not (header.startswith(_7Z_LISTABLE_MAGICS) or _looks_like_tar(header)):
+                return "unsupported archive format"
+        
+        # With libarchive, every supported format is listed in C without 7z
+        if libarchive is not None and archive_name.endswith(('.zip', '.7z', '.rar') + _TAR_SUFFIXES):
+            try:
+                contents = _list_archive_files(archive_path)
+            except libarchive.ArchiveError:
+                if archive_name.endswith('.zip'):
+                    return "corrupted zip file"
+                if archive_name.endswith(_TAR_SUFFIXES):
+                    return "corrupted tar file"
+                return "unsupported archive format"
+        
         # Handle ZIP files
-        if archive_name.endswith('.zip'):
+        elif archive_name.endswith('.zip'):
             try:
                 with zipfile.ZipFile(archive_path, 'r') as zip_ref:
-                    file_list = zip_ref.namelist()
-                    contents = [f for f in file_list if not f.endswith('/')]  # Exclude directories
+                    contents = [info.filename for info in zip_ref.infolist() if not info.is_dir()]  # Exclude directories
             except zipfile.BadZipFile:
                 return "corrupted zip file"
         
         # Handle TAR files (tar, tar.gz, tar.bz2, tar.xz, etc.)
-        elif any(archive_name.endswith(ext) for ext in ['.tar', '.tar.gz', '.tgz', '.tar.bz2', '.tbz2', '.tar.xz', '.txz']):
+        elif archive_name.endswith(_TAR_SUFFIXES):
             try:
                 with tarfile.open(archive_path, 'r:*') as tar_ref:
-                    file_list = tar_ref.getnames()
-                    contents = [f for f in file_list if tar_ref.getmember(f).isfile()]  # Only files, not directories
+                    # One pass over the members; getmember() per name would rescan the member list
+                    # each time. A repeated name counts as a file when its last entry is one.
+                    members = tar_ref.getmembers()
+                    is_file = {member.name: member.isfile() for member in members}
+                    contents = [member.name for member in members if is_file[member.name]]  # Only files, not directories
             except tarfile.TarError:
                 return "corrupted tar file"
         
         # Handle other formats using system tools (7z, rar)
         elif archive_name.endswith(('.7z', '.rar')):
             try:
-                # Try using 7z command if available
-                result = subprocess.run(['7z', 'l', str(archive_path)], 
-                                      capture_output=True, text=True, timeout=10)
-                if result.returncode == 0:
+                # Try using 7z command if available (unless the listing was batched)
+                if listing is None:
+                    result = subprocess.run(['7z', 'l', str(archive_path)], 
+                                          capture_output=True, timeout=10)
+                    if result.returncode == 0:
+                        listing = result.stdout.splitlines()
+                if listing is not None:
                     # Parse 7z output - this is a simplified parser
-                    lines = result.stdout.split('\n')
-                    in_file_list = False
-                    for line in lines:
-                        if '---' in line and 'Name' in lines[lines.index(line)-1]:
-                            in_file_list = True
-                            continue
-                        elif '---' in line and in_file_list:
-                            break
-                        elif in_file_list and line.strip():
-                            # Extract filename from 7z output format
-                            parts = line.split()
-                            if len(parts) >= 6:
-                                filename = ' '.join(parts[5:])
-                                if filename and not filename.endswith('/'):
-                                    contents.append(filename)
+                    contents = _parse_7z_listing(listing)
                 else:
                     return "unsupported archive format"
             except (subprocess.TimeoutExpired, FileNotFoundError):
@@ -925,23 +1433,9 @@ def get_archive_contents(archive_path: Path) -> str:
         # Limit the number of files shown and categorize them
         file_types = {}
         for file_path in contents[:20]:  # Limit to first 20 files
-            file_name = file_path.lower()
-            
             # Categorize files
-            if file_name.endswith(('.py', '.js', '.php', '.rb', '.pl', '.sh', '.c', '.cpp', '.java')):
-                file_types.setdefault('source_code', []).append(file_path)
-            elif file_name.endswith(('.html', '.htm', '.css', '.js')):
-                file_types.setdefault('web_files', []).append(file_path)
-            elif file_name.endswith(('.exe', '.bin', '.elf')):
-                file_types.setdefault('executables', []).append(file_path)
-            elif file_name.endswith(('.txt', '.md', '.pdf', '.doc')):
-                file_types.setdefault('documents', []).append(file_path)
-            elif file_name.endswith(('.png', '.jpg', '.jpeg', '.gif', '.bmp')):
-                file_types.setdefault('images', []).append(file_path)
-            elif file_name.endswith(('.zip', '.tar', '.gz')):
-                file_types.setdefault('nested_archives', []).append(file_path)
-            else:
-                file_types.setdefault('other', []).append(file_path)
+            category = _ARCHIVE_ENTRY_CATEGORIES.get(_name_suffix(file_path.lower()), 'other')
+            file_types.setdefault(category, []).append(file_path)
         
         # Format the output
         result_parts = []
@@ -963,6 +1457,125 @@ def get_archive_contents(archive_path: Path) -> str:
         return f"error analyzing archive: {str(e)}"
 
 
+@dataclass
+class _FileRecord:
+    """What get_enhanced_file_analysis learned about one task file."""
+    entries: List[Tuple[str, str]] = field(default_factory=list)  # (category list name, description)
+    content_type: str = 'binary'  # analyze_executable_content result
+    content: Optional[str] = None
+    library_dependency: Optional[str] = None
+
+
+# get_enhanced_file_analysis classifies tasks with more files than this on a thread pool
+_FILE_ANALYSIS_SERIAL_LIMIT = 8
+_FILE_ANALYSIS_MAX_THREADS = 32
+
+
+_SCRIPT_EXCERPT_CHARS = 2000
+
+
+def _read_script_excerpt(file_path: Path, limit: int = _SCRIPT_EXCERPT_CHARS) -> str:
+    """Return at most limit characters of a script, reading only one character past the cap."""
+    with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
+        content = f.read(limit + 1)
+    if len(content) > limit:
+        return content[:limit] + "\n... [truncated]"
+    return content
+
+
+def _classify_task_file(task_dir: Path, file_path: str, file_architectures: Dict[str, str],
+                        archive_listings: Dict[Path, List[bytes]]) -> _FileRecord:
+    """Classify one task file for get_enhanced_file_analysis."""
+    record = _FileRecord()
+    file_full_path = task_dir / file_path
+    file_info = get_file_type_info(file_full_path)
+    file_name = file_path.lower()
+    file_kind = _task_file_kind(file_name)
+    
+    # First, try content analysis for all files to determine if they're scripts
+    content_type = record.content_type = analyze_executable_content(file_full_path)
+    
+    # Special handling for Python scripts to detect servers
+    if content_type == 'python':
+        is_server, internal_port, script_content = analyze_python_server_script(file_full_path)
+        if is_server:
+            port_info = f" on port {internal_port}" if internal_port else ""
+            server_note = f" - detected as PYTHON SERVER{port_info}"
+            record.entries.append(('scripts', f"{file_path} ({file_info}){server_note}"))
+            record.entries.append(('executables', f"{file_path} ({file_info}){server_note}"))
+            
+            # Add full script content to file_contents for model analysis
+            header = f"--- PYTHON SERVER SCRIPT (listens on port {internal_port or 'UNKNOWN'}) ---"
+            record.content = f"{header}\n{script_content}"
+            return record
+
+    # Read file content for other scripts and small text files
+    if content_type in ['node', 'php', 'shell', 'ruby', 'perl', 'lua']:
+        try:
+            # Limit content size to avoid overly long prompts
+            record.content = _read_script_excerpt(file_full_path)
+        except Exception as e:
+            record.content = f"Error reading file: {e}"
+    
+    # Classify based on content analysis first, then fall back to extension/type analysis
+    if content_type in ['python', 'node', 'php', 'shell', 'ruby', 'perl', 'lua']:
+        # It's a script - add to both scripts and executables for proper handling
+        record.entries.append(('scripts', f"{file_path} ({file_info}) - detected as {content_type} script"))
+        record.entries.append(('executables', f"{file_path} ({file_info}) - detected as {content_type} script"))
+    elif content_type == 'binary' and ("executable" in file_info.lower() or file_name.endswith(('.bin', '.out'))):
+        # Architecture of this specific binary, from the task-wide sweep
+        arch = file_architectures[file_path]
+        arch_info = f" - {arch}-bit binary" if arch in ['32', '64'] else " - binary executable"
+        record.entries.append(('executables', f"{file_path} ({file_info}){arch_info}"))
+    elif file_kind == 'script':
+        # Fallback for script files that content analysis missed
+        record.entries.append(('scripts', f"{file_path} ({file_info}) - script file"))
+        record.entries.append(('executables', f"{file_path} ({file_info}) - script file"))
+        # Also try to read content for fallback scripts
+        try:
+            record.content = _read_script_excerpt(file_full_path)
+        except Exception as e:
+            record.content = f"Error reading file: {e}"
+    elif file_kind == 'web':
+        record.entries.append(('web_files', f"{file_path} ({file_info})"))
+    elif file_kind == 'config':
+        record.entries.append(('config_files', f"{file_path} ({file_info})"))
+    elif file_kind == 'library':
+        # Enhanced library detection including dynamic linkers
+        library_note = ""
+        if 'ld-linux' in file_name:
+            library_note = " - DYNAMIC LINKER"
+        elif file_name == 'libc.so.6':
+            library_note = " - LIBC LIBRARY"
+        elif file_name.startswith('lib'):
+            library_note = f" - SHARED LIBRARY ({file_name.split('.')[0]})"
+        
+        record.entries.append(('libraries', f"{file_path} ({file_info}){library_note}"))
+        
+        # Analyze library names for common dependencies
+        lib_name = Path(file_path).name.lower()
+        if 'pam' in lib_name:
+            record.library_dependency = f"PAM library detected: {file_path} - may need libpam0g:i386 for 32-bit or libpam0g for 64-bit"
+        elif 'ssl' in lib_name or 'crypto' in lib_name:
+            record.library_dependency = f"SSL/Crypto library detected: {file_path} - may need libssl-dev"
+        elif 'mysql' in lib_name:
+            record.library_dependency = f"MySQL library detected: {file_path} - may need libmysqlclient-dev"
+        elif 'sqlite' in lib_name:
+            record.library_dependency = f"SQLite library detected: {file_path} - may need libsqlite3-dev"
+        elif 'ld-linux' in lib_name:
+            record.library_dependency = f"Custom dynamic linker detected: {file_path} - MUST use patchelf to set interpreter path"
+        elif lib_name == 'libc.so.6':
+            record.library_dependency = f"Custom libc detected: {file_path} - MUST use patchelf to set library path"
+    elif file_kind == 'archive':
+        # Analyze archive contents
+        archive_contents = get_archive_contents(file_full_path, archive_listings.get(file_full_path))
+        record.entries.append(('archives', f"{file_path} ({file_info}) - Contents: {archive_contents}"))
+    else:
+        record.entries.append(('data_files', f"{file_path} ({file_info})"))
+    
+    return record
+
+
 def get_enhanced_file_analysis(task_path: str, available_files: List[str]) -> str:
     """Generate enhanced file analysis to help with Dockerfile creation."""
     
@@ -992,134 +1605,70 @@ def get_enhanced_file_analysis(task_path: str, available_files: List[str]) -> st
     # Detect provided libraries first
     provided_libs = detect_provided_libraries(task_path, available_files)
     
-    # Get binary architecture information for the overall task
-    detected_arch, binary_files = get_binary_architecture(task_path, available_files)
+    # Get binary architecture information for the overall task; the per-file results
+    # also serve the classification and the per-binary listing below
+    file_architectures = get_file_architectures(task_path, available_files)
+    detected_arch, binary_files = select_binary_architecture(file_architectures)
+    
+    # List all 7z/rar archives with one 7z run up front (libarchive needs no 7z at all)
+    archive_listings = {}
+    if libarchive is None:
+        archive_listings = list_7z_archives([task_dir / file_path for file_path in available_files
+                                             if file_path.lower().endswith(('.7z', '.rar'))
+                                             and _archive_cache_key(task_dir / file_path) not in _ARCHIVE_CONTENTS_CACHE])
+    
+    # The per-file checks are independent and I/O bound, so larger tasks classify files concurrently
+    classify = partial(_classify_task_file, task_dir, file_architectures=file_architectures,
+                       archive_listings=archive_listings)
+    if len(available_files) > _FILE_ANALYSIS_SERIAL_LIMIT:
+        with ThreadPoolExecutor(max_workers=min(_FILE_ANALYSIS_MAX_THREADS, len(available_files))) as executor:
+            records = list(executor.map(classify, available_files))
+    else:
+        records = [classify(file_path) for file_path in available_files]
     
-    for file_path in available_files:
-        file_full_path = task_dir / file_path
-        file_info = get_file_type_info(file_full_path)
-        file_name = file_path.lower()
-        
-        # First, try content analysis for all files to determine if they're scripts
-        content_type = analyze_executable_content(file_full_path)
-        
-        # Special handling for Python scripts to detect servers
-        if content_type == 'python':
-            is_server, internal_port, script_content = analyze_python_server_script(file_full_path)
-            if is_server:
-                port_info = f" on port {internal_port}" if internal_port else ""
-                server_note = f" - detected as PYTHON SERVER{port_info}"
-                scripts.append(f"{file_path} ({file_info}){server_note}")
-                executables.append(f"{file_path} ({file_info}){server_note}")
-                
-                # Add full script content to file_contents for model analysis
-                header = f"--- PYTHON SERVER SCRIPT (listens on port {internal_port or 'UNKNOWN'}) ---"
-                file_contents[file_path] = f"{header}\n{script_content}"
-                continue # Skip to next file
-
-        # Read file content for other scripts and small text files
-        if content_type in ['node', 'php', 'shell', 'ruby', 'perl', 'lua']:
-            try:
-                with open(file_full_path, 'r', encoding='utf-8', errors='ignore') as f:
-                    content = f.read()
-                    # Limit content size to avoid overly long prompts
-                    if len(content) > 2000:
-                        file_contents[file_path] = content[:2000] + "\n... [truncated]"
-                    else:
-                        file_contents[file_path] = content
-            except Exception as e:
-                file_contents[file_path] = f"Error reading file: {e}"
-        
-        # Classify based on content analysis first, then fall back to extension/type analysis
-        if content_type in ['python', 'node', 'php', 'shell', 'ruby', 'perl', 'lua']:
-            # It's a script - add to both scripts and executables for proper handling
-            scripts.append(f"{file_path} ({file_info}) - detected as {content_type} script")
-            executables.append(f"{file_path} ({file_info}) - detected as {content_type} script")
-        elif content_type == 'binary' and ("executable" in file_info.lower() or file_name.endswith(('.bin', '.out'))):
-            # Get architecture information for this specific binary
-            arch = detect_elf_architecture(file_full_path)
-            arch_info = f" - {arch}-bit binary" if arch in ['32', '64'] else " - binary executable"
-            executables.append(f"{file_path} ({file_info}){arch_info}")
-        elif file_name.endswith(('.py', '.js', '.php', '.rb', '.pl', '.sh')):
-            # Fallback for script files that content analysis missed
-            scripts.append(f"{file_path} ({file_info}) - script file")
-            executables.append(f"{file_path} ({file_info}) - script file")
-            # Also try to read content for fallback scripts
-            try:
-                with open(file_full_path, 'r', encoding='utf-8', errors='ignore') as f:
-                    content = f.read()
-                    if len(content) > 2000:
-                        file_contents[file_path] = content[:2000] + "\n... [truncated]"
-                    else:
-                        file_contents[file_path] = content
-            except Exception as e:
-                file_contents[file_path] = f"Error reading file: {e}"
-        elif file_name.endswith(('.html', '.htm', '.css', '.js', '.php')):
-            web_files.append(f"{file_path} ({file_info})")
-        elif file_name.endswith(('.conf', '.cfg', '.ini', '.yml', '.yaml', '.json')):
-            config_files.append(f"{file_path} ({file_info})")
-        elif file_name.endswith(('.so', '.dll', '.a')) or 'ld-linux' in file_name:
-            # Enhanced library detection including dynamic linkers
-            library_note = ""
-            if 'ld-linux' in file_name:
-                library_note = " - DYNAMIC LINKER"
-            elif file_name == 'libc.so.6':
-                library_note = " - LIBC LIBRARY"
-            elif file_name.startswith('lib'):
-                library_note = f" - SHARED LIBRARY ({file_name.split('.')[0]})"
-            
-            libraries.append(f"{file_path} ({file_info}){library_note}")
-            
-            # Analyze library names for common dependencies
-            lib_name = Path(file_path).name.lower()
-            if 'pam' in lib_name:
-                library_dependencies.append(f"PAM library detected: {file_path} - may need libpam0g:i386 for 32-bit or libpam0g for 64-bit")
-            elif 'ssl' in lib_name or 'crypto' in lib_name:
-                library_dependencies.append(f"SSL/Crypto library detected: {file_path} - may need libssl-dev")
-            elif 'mysql' in lib_name:
-                library_dependencies.append(f"MySQL library detected: {file_path} - may need libmysqlclient-dev")
-            elif 'sqlite' in lib_name:
-                library_dependencies.append(f"SQLite library detected: {file_path} - may need libsqlite3-dev")
-            elif 'ld-linux' in lib_name:
-                library_dependencies.append(f"Custom dynamic linker detected: {file_path} - MUST use patchelf to set interpreter path")
-            elif lib_name == 'libc.so.6':
-                library_dependencies.append(f"Custom libc detected: {file_path} - MUST use patchelf to set library path")
-        elif file_name.endswith(('.zip', '.tar', '.tar.gz', '.tgz', '.tar.bz2', '.tbz2', '.tar.xz', '.txz', '.rar', '.7z')):
-            # Analyze archive contents
-            archive_contents = get_archive_contents(file_full_path)
-            archives.append(f"{file_path} ({file_info}) - Contents: {archive_contents}")
-        else:
-            data_files.append(f"{file_path} ({file_info})")
+    categories = {
+        'executables': executables, 'scripts': scripts, 'web_files': web_files,
+        'config_files': config_files, 'data_files': data_files, 'libraries': libraries,
+        'archives': archives,
+    }
+    content_types = {}
+    for file_path, record in zip(available_files, records):
+        content_types[file_path] = record.content_type
+        for category, description in record.entries:
+            categories[category].append(description)
+        if record.content is not None:
+            file_contents[file_path] = record.content
+        if record.library_dependency is not None:
+            library_dependencies.append(record.library_dependency)
     
     # Add overall binary architecture analysis
     if binary_files:
         analysis.append(f"\n🏗️  BINARY ARCHITECTURE ANALYSIS:")
         analysis.append(f"  - Detected architecture: {detected_arch}-bit")
         analysis.append(f"  - Binary files analyzed: {len(binary_files)}")
-        for binary_file in binary_files:
-            binary_path = task_dir / binary_file
-            arch = detect_elf_architecture(binary_path)
-            analysis.append(f"    * {binary_file}: {arch}-bit")
+        analysis.extend(f"    * {binary_file}: {file_architectures[binary_file]}-bit" for binary_file in binary_files)
         
         if detected_arch == '32':
-            analysis.append("  - 🔧 32-bit binaries detected - requires i386 compatibility packages")
-            analysis.append("  - Use RUN dpkg --add-architecture i386 && apt-get update")
-            analysis.append("  - Install 32-bit versions of required libraries (package:i386)")
+            analysis.extend((
+                "  - 🔧 32-bit binaries detected - requires i386 compatibility packages",
+                "  - Use RUN dpkg --add-architecture i386 && apt-get update",
+                "  - Install 32-bit versions of required libraries (package:i386)",
+            ))
         elif detected_arch == '64':
             analysis.append("  - ✅ 64-bit binaries detected - standard amd64 packages should work")
     
     # Add provided libraries analysis at the top
     if provided_libs:
         analysis.append(f"\n🔧 CUSTOM LIBRARIES DETECTED ({len(provided_libs)}):")
-        for lib_type, lib_path in provided_libs.items():
-            analysis.append(f"  - {lib_type.upper()}: {lib_path}")
-        analysis.append("  → These libraries require special handling with patchelf to avoid segmentation faults")
-        analysis.append("  → Binaries MUST be patched to use these libraries instead of system ones")
+        analysis.extend(f"  - {lib_type.upper()}: {lib_path}" for lib_type, lib_path in provided_libs.items())
+        analysis.extend((
+            "  → These libraries require special handling with patchelf to avoid segmentation faults",
+            "  → Binaries MUST be patched to use these libraries instead of system ones",
+        ))
     
     if executables:
         analysis.append(f"\nEXECUTABLE FILES ({len(executables)}):")
-        for exe in executables[:5]:  # Limit to first 5
-            analysis.append(f"  - {exe}")
+        analysis.extend(f"  - {exe}" for exe in executables[:5])  # Limit to first 5
         if len(executables) > 5:
             analysis.append(f"  ... and {len(executables) - 5} more")
         
@@ -1156,8 +1705,10 @@ def get_enhanced_file_analysis(task_path: str, available_files: List[str]) -> st
             elif "binary executable" in exe_info or "-bit binary" in exe_info:
                 binary_executables.append(exe_path)
             else:
-                # Fallback: re-analyze content for files without clear detection info
-                file_type = analyze_executable_content(full_file_path)
+                # Fallback: content type from the classification pass for files without clear detection info
+                file_type = content_types.get(exe_path)
+                if file_type is None:
+                    file_type = analyze_executable_content(full_file_path)
                 
                 if file_type == 'python':
                     python_scripts.append(exe_path)
@@ -1176,17 +1727,21 @@ def get_enhanced_file_analysis(task_path: str, available_files: List[str]) -> st
         if binary_executables:
             analysis.append("  - BINARY EXECUTABLES:")
             if detected_arch == '32':
-                analysis.append("    * 🔧 32-bit binaries require special Docker setup with i386 architecture support")
-                analysis.append("    * Add RUN dpkg --add-architecture i386 && apt-get update to Dockerfile")
-                analysis.append("    * Install 32-bit libraries: libc6:i386, libstdc++6:i386, etc.")
+                analysis.extend((
+                    "    * 🔧 32-bit binaries require special Docker setup with i386 architecture support",
+                    "    * Add RUN dpkg --add-architecture i386 && apt-get update to Dockerfile",
+                    "    * Install 32-bit libraries: libc6:i386, libstdc++6:i386, etc.",
+                ))
             elif detected_arch == '64':
                 analysis.append("    * ✅ 64-bit binaries use standard amd64 architecture")
             
             analysis.append("    * Use run.sh wrapper script for better stability and crash reporting")
             example_binary = Path(binary_executables[0]).name
             analysis.append(f"    * Create wrapper: RUN echo '#!/bin/sh\\n/challenge/{example_binary}' > /challenge/run.sh && chmod +x /challenge/run.sh")
-            analysis.append("    * Execute with: CMD [\"socat\", \"TCP-LISTEN:1337,reuseaddr,fork\", \"EXEC:/challenge/run.sh,stderr\"]")
-            analysis.append("    * Remember to chmod +x both the binary and run.sh")
+            analysis.extend((
+                "    * Execute with: CMD [\"socat\", \"TCP-LISTEN:1337,reuseaddr,fork\", \"EXEC:/challenge/run.sh,stderr\"]",
+                "    * Remember to chmod +x both the binary and run.sh",
+            ))
             
             # Add specific library handling recommendations for binaries
             if provided_libs:
@@ -1198,77 +1753,84 @@ def get_enhanced_file_analysis(task_path: str, available_files: List[str]) -> st
     
     if scripts:
         analysis.append(f"\nSCRIPT FILES ({len(scripts)}):")
-        for script in scripts[:5]:
-            analysis.append(f"  - {script}")
+        analysis.extend(f"  - {script}" for script in scripts[:5])
         if len(scripts) > 5:
             analysis.append(f"  ... and {len(scripts) - 5} more")
         analysis.append("  → Install appropriate runtime (python3, node, php, etc.)")
     
     if web_files:
         analysis.append(f"\nWEB FILES ({len(web_files)}):")
-        for web in web_files[:5]:
-            analysis.append(f"  - {web}")
+        analysis.extend(f"  - {web}" for web in web_files[:5])
         if len(web_files) > 5:
             analysis.append(f"  ... and {len(web_files) - 5} more")
         analysis.append("  → Install web server (apache2, nginx) and copy to /var/www/html/")
     
     if archives:
         analysis.append(f"\nARCHIVE FILES ({len(archives)}):")
-        for archive in archives:
-            analysis.append(f"  - {archive}")
+        analysis.extend(f"  - {archive}" for archive in archives)
         analysis.append("  → Archive contents shown above - analyze contents to determine if server hosting is needed")
     
     if config_files:
         analysis.append(f"\nCONFIG FILES ({len(config_files)}):")
-        for config in config_files[:3]:
-            analysis.append(f"  - {config}")
+        analysis.extend(f"  - {config}" for config in config_files[:3])
         if len(config_files) > 3:
             analysis.append(f"  ... and {len(config_files) - 3} more")
         analysis.append("  → May need special placement or environment setup")
     
     if libraries:
         analysis.append(f"\nLIBRARY FILES ({len(libraries)}):")
-        for lib in libraries[:5]:
-            analysis.append(f"  - {lib}")
+        analysis.extend(f"  - {lib}" for lib in libraries[:5])
         if len(libraries) > 5:
             analysis.append(f"  ... and {len(libraries) - 5} more")
-        analysis.append("  → CRITICAL: Custom libraries require patchelf setup for proper binary execution")
-        analysis.append("  → Copy to /challenge/ and patch binary interpreter/rpath settings")
+        analysis.extend((
+            "  → CRITICAL: Custom libraries require patchelf setup for proper binary execution",
+            "  → Copy to /challenge/ and patch binary interpreter/rpath settings",
+        ))
     
     if data_files:
         analysis.append(f"\nDATA/OTHER FILES ({len(data_files)}):")
-        for data in data_files[:3]:
-            analysis.append(f"  - {data}")
+        analysis.extend(f"  - {data}" for data in data_files[:3])
         if len(data_files) > 3:
             analysis.append(f"  ... and {len(data_files) - 3} more")
     
     # Add recommendations
     analysis.append(f"\nRECOMMENDATIONS:")
     if executables:
-        analysis.append("  - Use socat to host executable binaries on port 1337")
-        analysis.append("  - Set executable permissions with chmod +x")
+        analysis.extend((
+            "  - Use socat to host executable binaries on port 1337",
+            "  - Set executable permissions with chmod +x",
+        ))
         if provided_libs:
-            analysis.append("  - 🔧 CRITICAL: Custom libraries detected - use patchelf to fix library paths")
-            analysis.append("  - Without proper library setup, binaries will segfault")
+            analysis.extend((
+                "  - 🔧 CRITICAL: Custom libraries detected - use patchelf to fix library paths",
+                "  - Without proper library setup, binaries will segfault",
+            ))
     if scripts:
-        analysis.append("  - Install appropriate runtime environment")
-        analysis.append("  - Copy scripts to /challenge/ directory")
+        analysis.extend((
+            "  - Install appropriate runtime environment",
+            "  - Copy scripts to /challenge/ directory",
+        ))
     if web_files:
-        analysis.append("  - Set up web server and copy files to document root")
-        analysis.append("  - Expose port 80 or 8080")
+        analysis.extend((
+            "  - Set up web server and copy files to document root",
+            "  - Expose port 80 or 8080",
+        ))
     if archives:
-        analysis.append("  - Consider archive contents when deciding server hosting needs")
-        analysis.append("  - Archives with source code + data files often indicate file-based challenges")
-        analysis.append("  - Archives with web files or executables may need server hosting")
+        analysis.extend((
+            "  - Consider archive contents when deciding server hosting needs",
+            "  - Archives with source code + data files often indicate file-based challenges",
+            "  - Archives with web files or executables may need server hosting",
+        ))
     
     # Enhanced library dependencies section
     if library_dependencies:
         analysis.append(f"\nLIBRARY DEPENDENCIES DETECTED:")
-        for dep in library_dependencies:
-            analysis.append(f"  - {dep}")
-        analysis.append("  → Ensure proper library packages are installed in Dockerfile")
-        analysis.append("  → Use patchelf commands to set correct interpreter and library paths")
-        analysis.append("  → 🚨 CRITICAL: Custom libraries (especially ld-linux and libc) require special handling")
+        analysis.extend(f"  - {dep}" for dep in library_dependencies)
+        analysis.extend((
+            "  → Ensure proper library packages are installed in Dockerfile",
+            "  → Use patchelf commands to set correct interpreter and library paths",
+            "  → 🚨 CRITICAL: Custom libraries (especially ld-linux and libc) require special handling",
+        ))
     
     # Add file contents section for scripts
     if file_contents:
@@ -1281,13 +1843,16 @@ def get_enhanced_file_analysis(task_path: str, available_files: List[str]) -> st
     return "\n".join(analysis)
 
 
+_UBUNTU_VERSION_RE = re.compile(r'ubuntu:(\d+\.\d+)', re.IGNORECASE)
+
+
 def get_ubuntu_version_from_base_image(base_image: str) -> str:
     """
     Extract Ubuntu version from base image string.
     Returns version like "16.04", "18.04", "20.04", etc.
     """
     # Extract version from strings like "ubuntu:20.04", "ubuntu:16.04"
-    match = re.search(r'ubuntu:(\d+\.\d+)', base_image.lower())
+    match = _UBUNTU_VERSION_RE.search(base_image)
     if match:
         return match.group(1)
     
@@ -1623,13 +2188,13 @@ def generate_adaptive_docker_setup(base_image: str, architecture: str = "64", ha
     return '\n'.join(setup_commands)
 
 
-def generate_fallback_dockerfile(task_data: Dict, available_files: List[str], provided_libs: Dict[str, str], test_results: Dict[str, Any], verbose: bool = False) -> str:
+def generate_fallback_dockerfile(task_data: Dict, available_files: List[str], provided_libs: Dict[str, str], test_results: LibConfigResult, verbose: bool = False) -> str:
     """
     Generate a fallback Dockerfile when the main approach fails.
     Uses alternative strategies like LD_LIBRARY_PATH and different base images.
     """
     task_name = task_data.get("task_name", "")
-    base_image = test_results.get("recommended_base_image", "ubuntu:16.04")  # Default to older base for compatibility
+    base_image = test_results.recommended_base_image
     
     if verbose:
         print(f"{BLUE}Generating fallback Dockerfile with {base_image}...{RESET}")
@@ -1688,9 +2253,9 @@ def generate_fallback_dockerfile(task_data: Dict, available_files: List[str], pr
     
     # Find the main executable
     main_executable = None
-    task_dir = Path(task_data.get("task_path", ""))
+    task_dir = os.fspath(Path(task_data.get("task_path", "")))
     for file_path in available_files:
-        full_path = task_dir / file_path
+        full_path = os.path.join(task_dir, file_path)
         if analyze_executable_content(full_path) == 'binary':
             main_executable = file_path
             break
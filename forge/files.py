@@ -7,13 +7,76 @@ File discovery and metadata helpers extracted from ctf_forge.py to improve modul
 """
 
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
+import errno
+import heapq
+import json
 import os
+import shutil
+import tempfile
 import yaml
 import stat
 import mimetypes
+from functools import lru_cache
 from typing import Optional as _Optional
 
+try:
+    from yaml import CSafeLoader as _YamlSafeLoader  # optional: libyaml's C parser, when PyYAML was built with it
+except ImportError:
+    from yaml import SafeLoader as _YamlSafeLoader
+
+# Files that mark a directory as a task directory
+REQUIRED_TASK_FILES = frozenset({'REHOST.md', 'DESCRIPTION.md'})
+
+# Written next to the generated files once a task has been fully processed
+MANIFEST_FILENAME = ".ctfforge.manifest.json"
+
+# Path components get_task_files leaves out (task metadata, generated files, vendored trees)
+TASK_FILE_EXCLUDES = frozenset({"REHOST.md", "DESCRIPTION.md", "README.md", ".git", "Dockerfile", "docker-compose.yml", "Users", "Cryptodome", MANIFEST_FILENAME})
+
+# File names get_task_files_with_info leaves out
+TASK_INFO_EXCLUDES = frozenset({"REHOST.md", "DESCRIPTION.md", "README.md", ".git", "Dockerfile", "docker-compose.yml", MANIFEST_FILENAME})
+
+# Where a task keeps its flag hash, in lookup order
+SHA256_FILE_NAMES = ('flag.sha256', '.flag.sha256', 'flag.sha256.txt')
+
+# module.yml challenge name prefixes ("PWN - title") to categories; anything else is misc
+CATEGORY_MAPPING = {
+    'PWN': 'pwn',
+    'CRYPTO': 'crypto',
+    'CRYTPO': 'crypto',
+    'WEB': 'web',
+    'REV': 'rev',
+    'REVERSE': 'rev',
+    'FORENSICS': 'forensics',
+    'STEGO': 'forensics',
+    'MISC': 'misc',
+    'LOGICAL': 'misc',
+    'EXPLOIT': 'pwn',
+    'EXPLOITATION': 'pwn',
+    'BINARY': 'pwn',
+    'BINARY EXPLOITATION': 'pwn',
+    'VULNERABILITY': 'pwn',
+    'ROP': 'pwn',
+    'TRIVIA': 'misc',
+    'OSINT': 'misc',
+    'RECON': 'misc',
+    'RADIO FREQUENCY': 'misc',
+    'SOCIAL ENGINEERING': 'misc',
+    'BLOCKCHAIN': 'misc',
+    'WWW': 'web',
+    'PWN/MISC': 'misc',
+    'WARMUP': 'misc',
+    'PRIVATE': 'misc',
+    'CLUELESS': 'misc',
+    'FRNG': 'misc',
+    'RNG': 'misc',
+    'NUMBERSLEUTHV1': 'misc',
+    'NUMBERSLEUTHV2': 'misc',
+    'NUMBERSLEUTHV3': 'misc',
+    'SECUREREPITITIONS': 'misc'
+}
+
 
 def has_required_files(directory: str) -> bool:
     """Check if directory contains both REHOST.md and DESCRIPTION.md files."""
@@ -32,21 +95,23 @@ def has_required_files(directory: str) -> bool:
 def find_task_directories(base_dir: str) -> List[str]:
     """Find all task directories that contain required files."""
     task_dirs_with_files = []
+    stack = [base_dir]
 
-    for root, dirs, files in os.walk(base_dir):
-        if root == base_dir:
+    while stack:
+        directory = stack.pop()
+        try:
+            with os.scandir(directory) as entries:
+                names = set()
+                for entry in entries:
+                    names.add(entry.name)
+                    # Skip hidden directories (those starting with a dot)
+                    if entry.is_dir(follow_symlinks=False) and not entry.name.startswith('.'):
+                        stack.append(entry.path)
+        except OSError:
             continue
 
-        # Skip hidden directories (those starting with a dot)
-        path_parts = Path(root).parts
-        skip_directory = False
-        for part in path_parts:
-            if part.startswith('.'):
-                skip_directory = True
-                break
-
-        if not skip_directory and has_required_files(root):
-            task_dirs_with_files.append(root)
+        if directory != base_dir and REQUIRED_TASK_FILES.issubset(names):
+            task_dirs_with_files.append(directory)
 
     return sorted(task_dirs_with_files)
 
@@ -102,69 +167,51 @@ def read_init_content(task_path: str) -> str:
     return ""
 
 
-def get_category_from_module_yml(task_path: str) -> Optional[str]:
-    """Get category information from module.yml in the parent directory."""
-    task_dir = Path(task_path)
-    parent_dir = task_dir.parent
-    module_yml = parent_dir / "module.yml"
-
-    if not module_yml.exists():
-        return None
-
+@lru_cache(maxsize=256)
+def _load_module_categories(module_yml: str, mtime_ns: int, size: int) -> Dict[str, Optional[str]]:
+    """
+    Parse a module.yml once into {challenge id: category}; keyed on mtime and size so edits invalidate.
+    As with a scan for one id, the first matching challenge with a "CATEGORY - title" name wins.
+    """
+    categories: Dict[str, Optional[str]] = {}
     try:
         with open(module_yml, 'r', encoding='utf-8') as f:
-            module_data = yaml.safe_load(f)
+            module_data = yaml.load(f, Loader=_YamlSafeLoader)
 
         if not module_data or 'challenges' not in module_data:
-            return None
+            return categories
 
-        task_name = task_dir.name
         for challenge in module_data['challenges']:
-            if challenge.get('id') == task_name:
+            challenge_id = challenge.get('id')
+            if not isinstance(challenge_id, str) or challenge_id in categories:
+                continue  # Task names are strings; an earlier entry already decided this id
+            try:
                 name = challenge.get('name', '')
                 if ' - ' in name:
                     category_part = name.split(' - ')[0].strip().upper()
-                    category_mapping = {
-                        'PWN': 'pwn',
-                        'CRYPTO': 'crypto',
-                        'CRYTPO': 'crypto',
-                        'WEB': 'web',
-                        'REV': 'rev',
-                        'REVERSE': 'rev',
-                        'FORENSICS': 'forensics',
-                        'STEGO': 'forensics',
-                        'MISC': 'misc',
-                        'LOGICAL': 'misc',
-                        'EXPLOIT': 'pwn',
-                        'EXPLOITATION': 'pwn',
-                        'BINARY': 'pwn',
-                        'BINARY EXPLOITATION': 'pwn',
-                        'VULNERABILITY': 'pwn',
-                        'ROP': 'pwn',
-                        'TRIVIA': 'misc',
-                        'OSINT': 'misc',
-                        'RECON': 'misc',
-                        'RADIO FREQUENCY': 'misc',
-                        'SOCIAL ENGINEERING': 'misc',
-                        'BLOCKCHAIN': 'misc',
-                        'WWW': 'web',
-                        'PWN/MISC': 'misc',
-                        'WARMUP': 'misc',
-                        'PRIVATE': 'misc',
-                        'CLUELESS': 'misc',
-                        'FRNG': 'misc',
-                        'RNG': 'misc',
-                        'NUMBERSLEUTHV1': 'misc',
-                        'NUMBERSLEUTHV2': 'misc',
-                        'NUMBERSLEUTHV3': 'misc',
-                        'SECUREREPITITIONS': 'misc'
-                    }
-                    return category_mapping.get(category_part, 'misc')
-
-        return None
+                    categories[challenge_id] = CATEGORY_MAPPING.get(category_part, 'misc')
+            except Exception:
+                categories[challenge_id] = None  # A malformed entry leaves its task without a category
     except Exception:
+        # Ids not decided before a malformed module are looked up as missing
+        pass
+
+    return categories
+
+
+def get_category_from_module_yml(task_path: str) -> Optional[str]:
+    """Get category information from module.yml in the parent directory."""
+    task_dir = Path(task_path)
+    module_yml = task_dir.parent / "module.yml"
+
+    try:
+        st = os.stat(module_yml)
+    except (OSError, ValueError):
         return None
 
+    # Sibling tasks share one parse of their module.yml
+    return _load_module_categories(os.fspath(module_yml), st.st_mtime_ns, st.st_size).get(task_dir.name)
+
 
 def extract_task_info(task_path: str) -> Optional[Dict]:
     """Extract task information from path and create task data structure."""
@@ -213,9 +260,59 @@ def filter_out_patched_files(files: List[str]) -> List[str]:
     return filtered_files
 
 
-def get_task_files(task_path: str) -> List[str]:
-    """Get list of files in the task directory, excluding certain patterns."""
-    exclude_patterns = {"REHOST.md", "DESCRIPTION.md", "README.md", ".git", "Dockerfile", "docker-compose.yml", "Users", "Cryptodome"}
+def _walk_files(task_dir: str, excluded_dirs=frozenset()):
+    """
+    Yield (relative path, DirEntry, under excluded dir) for every file below task_dir, like
+    Path.rglob("*") filtered with is_file(): symlinks to files count, symlinked directories are
+    not entered, unreadable directories are skipped. File types come from the directory listing,
+    so regular files cost no stat call. The flag tells whether any directory on the way down is
+    named in excluded_dirs; it is worked out once per directory rather than per file.
+    """
+    stack = [(task_dir, '', False)]
+    while stack:
+        directory, prefix, excluded = stack.pop()
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    relative_path = prefix + entry.name
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append((entry.path, relative_path + os.sep, excluded or entry.name in excluded_dirs))
+                    elif entry.is_file():
+                        yield relative_path, entry, excluded
+        except PermissionError:
+            continue
+
+
+def _enumerate_task_files(task_dir: Path) -> Tuple[Tuple[str, bool], ...]:
+    """
+    Walk task_dir once and return (relative path, under a TASK_FILE_EXCLUDES directory) for every
+    file; get_task_files and get_task_files_with_info apply their own excludes.
+    """
+    return tuple(
+        (relative_name, excluded)
+        for relative_name, _, excluded in _walk_files(os.fspath(task_dir), TASK_FILE_EXCLUDES)
+    )
+
+
+def list_task_files(task_path: str) -> Optional[Tuple[Tuple[str, bool], ...]]:
+    """
+    One walk of a task directory for callers that need both get_task_files and
+    get_task_files_with_info; pass the result to both as listing. The listing is not cached,
+    so it is only as current as the moment it was taken.
+    Returns None when the directory cannot be read; the helpers then walk it themselves.
+    """
+    try:
+        return _enumerate_task_files(Path(task_path))
+    except Exception:
+        return None
+
+
+def get_task_files(task_path: str, listing: Optional[Tuple[Tuple[str, bool], ...]] = None) -> List[str]:
+    """
+    Get list of files in the task directory, excluding certain patterns.
+    listing is an earlier list_task_files result for task_path; without one the directory is walked.
+    """
+    exclude_patterns = TASK_FILE_EXCLUDES
 
     files: List[str] = []
     task_dir = Path(task_path)
@@ -224,14 +321,12 @@ def get_task_files(task_path: str) -> List[str]:
         return files
 
     try:
-        for item in task_dir.rglob("*"):
-            if any(part in exclude_patterns for part in item.parts):
+        if listing is None:
+            listing = _enumerate_task_files(task_dir)
+        for relative_name, in_excluded_dir in listing:
+            if in_excluded_dir or os.path.basename(relative_name) in exclude_patterns:
                 continue
-
-            if item.is_file():
-                relative_path = item.relative_to(task_dir)
-                if relative_path.name not in exclude_patterns:
-                    files.append(str(relative_path))
+            files.append(relative_name)
     except Exception:
         pass
 
@@ -239,69 +334,67 @@ def get_task_files(task_path: str) -> List[str]:
     return sorted(files)
 
 
+# stat() errors that Path.exists() reports as a missing file
+_MISSING_FILE_ERRNOS = frozenset({errno.ENOENT, errno.ENOTDIR, errno.EBADF, errno.ELOOP})
+
+
+# File type descriptions by lowercased suffix; mimetypes is only consulted for other suffixes
+_SUFFIX_TO_TYPE = {
+    **{suffix: f"{suffix[1:]} script" for suffix in ('.py', '.js', '.php', '.rb', '.pl', '.sh', '.bat')},
+    **dict.fromkeys(('.txt', '.md', '.rst'), "text file"),
+    **dict.fromkeys(('.c', '.cpp', '.cc', '.cxx', '.h', '.hpp'), "C/C++ source"),
+    '.java': "Java source",
+    **dict.fromkeys(('.html', '.htm'), "HTML file"),
+    '.css': "CSS file",
+    '.json': "JSON file",
+    '.xml': "XML file",
+    '.sql': "SQL file",
+    **dict.fromkeys(('.yml', '.yaml'), "YAML file"),
+    **dict.fromkeys(('.zip', '.tar', '.gz', '.bz2', '.xz', '.7z'), "archive file"),
+    **dict.fromkeys(('.jpg', '.jpeg', '.png', '.gif', '.bmp', '.svg'), "image file"),
+    '.pdf': "PDF file",
+    **dict.fromkeys(('.exe', '.dll'), "Windows executable"),
+    '.so': "shared library",
+    '.a': "static library",
+    '.o': "object file",
+}
+
+
 def get_file_type_info(file_path: Path) -> str:
     """Get detailed file type information for a file."""
     try:
-        if not file_path.exists():
+        # One stat for the existence, directory, size and mode checks
+        try:
+            file_stat = os.stat(file_path)
+        except OSError as e:
+            if e.errno in _MISSING_FILE_ERRNOS:
+                return "missing file"
+            raise
+        except ValueError:
             return "missing file"
 
-        if file_path.is_dir():
+        if stat.S_ISDIR(file_stat.st_mode):
             return "directory"
 
-        size = file_path.stat().st_size
+        size = file_stat.st_size
         size_str = f"{size} bytes"
         if size > 1024:
             size_str = f"{size//1024} KB"
         if size > 1024*1024:
             size_str = f"{size//(1024*1024)} MB"
 
-        file_stat = file_path.stat()
         is_executable = bool(file_stat.st_mode & stat.S_IEXEC)
 
-        mime_type, _ = mimetypes.guess_type(str(file_path))
-
         suffix = file_path.suffix.lower()
-        name = file_path.name.lower()
 
         file_type = "unknown"
 
         if is_executable and suffix == "":
             file_type = "executable binary"
-        elif suffix in ['.py', '.js', '.php', '.rb', '.pl', '.sh', '.bat']:
-            file_type = f"{suffix[1:]} script"
-        elif suffix in ['.txt', '.md', '.rst']:
-            file_type = "text file"
-        elif suffix in ['.c', '.cpp', '.cc', '.cxx', '.h', '.hpp']:
-            file_type = "C/C++ source"
-        elif suffix in ['.java']:
-            file_type = "Java source"
-        elif suffix in ['.html', '.htm']:
-            file_type = "HTML file"
-        elif suffix in ['.css']:
-            file_type = "CSS file"
-        elif suffix in ['.json']:
-            file_type = "JSON file"
-        elif suffix in ['.xml']:
-            file_type = "XML file"
-        elif suffix in ['.sql']:
-            file_type = "SQL file"
-        elif suffix in ['.yml', '.yaml']:
-            file_type = "YAML file"
-        elif suffix in ['.zip', '.tar', '.gz', '.bz2', '.xz', '.7z']:
-            file_type = "archive file"
-        elif suffix in ['.jpg', '.jpeg', '.png', '.gif', '.bmp', '.svg']:
-            file_type = "image file"
-        elif suffix in ['.pdf']:
-            file_type = "PDF file"
-        elif suffix in ['.exe', '.dll']:
-            file_type = "Windows executable"
-        elif suffix in ['.so']:
-            file_type = "shared library"
-        elif suffix in ['.a']:
-            file_type = "static library"
-        elif suffix in ['.o']:
-            file_type = "object file"
-        elif mime_type:
+        elif suffix in _SUFFIX_TO_TYPE:
+            file_type = _SUFFIX_TO_TYPE[suffix]
+        else:
+            mime_type = mimetypes.guess_type(str(file_path))[0] or ""
             if mime_type.startswith('text/'):
                 file_type = "text file"
             elif mime_type.startswith('image/'):
@@ -316,9 +409,12 @@ def get_file_type_info(file_path: Path) -> str:
         return f"error reading file: {str(e)}"
 
 
-def get_task_files_with_info(task_path: str) -> str:
-    """Get formatted string with file information for all task files."""
-    exclude_patterns = {"REHOST.md", "DESCRIPTION.md", "README.md", ".git", "Dockerfile", "docker-compose.yml"}
+def get_task_files_with_info(task_path: str, listing: Optional[Tuple[Tuple[str, bool], ...]] = None) -> str:
+    """
+    Get formatted string with file information for all task files.
+    listing is an earlier list_task_files result for task_path; without one the directory is walked.
+    """
+    exclude_patterns = TASK_INFO_EXCLUDES
 
     files_info: List[str] = []
     task_dir = Path(task_path)
@@ -327,29 +423,21 @@ def get_task_files_with_info(task_path: str) -> str:
         return "No files found"
 
     try:
-        all_files = []
-        for item in task_dir.rglob("*"):
-            if item.is_file():
-                relative_path = item.relative_to(task_dir)
-                if relative_path.name not in exclude_patterns:
-                    all_files.append((relative_path, item))
+        if listing is None:
+            listing = _enumerate_task_files(task_dir)
+        all_files = [
+            relative_name for relative_name, _ in listing
+            if os.path.basename(relative_name) not in exclude_patterns
+        ]
 
         if not all_files:
             return "No files found"
 
-        file_paths = [str(rel_path) for rel_path, _ in all_files]
-        filtered_paths = filter_out_patched_files(file_paths)
-        filtered_path_set = set(filtered_paths)
-
-        all_files = [(rel_path, item) for rel_path, item in all_files if str(rel_path) in filtered_path_set]
-
-        all_files.sort(key=lambda x: str(x[0]))
+        all_files = filter_out_patched_files(all_files)
 
-        files_to_show = all_files[:10]
-
-        for relative_path, item in files_to_show:
-            file_info = get_file_type_info(item)
-            files_info.append(f"  - {relative_path}: {file_info}")
+        for relative_name in heapq.nsmallest(10, all_files):
+            file_info = get_file_type_info(task_dir / relative_name)
+            files_info.append(f"  - {relative_name}: {file_info}")
 
         if len(all_files) > 10:
             files_info.append(f"  ... and {len(all_files) - 10} more files")
@@ -364,9 +452,7 @@ def find_sha256_file(task_path: str) -> _Optional[str]:
     """Find and read sha256 file content from task directory."""
     task_dir = Path(task_path)
 
-    sha256_files = ['flag.sha256', '.flag.sha256', 'flag.sha256.txt']
-
-    for filename in sha256_files:
+    for filename in SHA256_FILE_NAMES:
         sha256_file = task_dir / filename
         if sha256_file.exists() and sha256_file.is_file():
             try:
@@ -379,19 +465,86 @@ def find_sha256_file(task_path: str) -> _Optional[str]:
     return None
 
 
+# Vendored trees find_check_file does not look into
+_CHECK_FILE_EXCLUDES = frozenset({"Users", "Cryptodome"})
+
+
 def find_check_file(task_path: str) -> _Optional[str]:
     """Find check file and return its absolute path."""
     task_dir = Path(task_path)
 
     try:
-        for file_path in task_dir.rglob("*"):
-            if any(part in ["Users", "Cryptodome"] for part in file_path.parts):
-                continue
-            if file_path.is_file() and 'check' in file_path.name.lower():
-                return str(file_path.absolute())
+        for dirpath, dirnames, filenames in os.walk(os.fspath(task_dir)):
+            # Same top-down order as rglob, but excluded trees are never entered
+            dirnames[:] = [d for d in dirnames if d not in _CHECK_FILE_EXCLUDES]
+            for name in filenames:
+                if 'check' in name.lower():
+                    file_path = Path(dirpath, name)
+                    if file_path.is_file():
+                        return str(file_path.absolute())
     except Exception:
         pass
 
     return None
 
 
+
+
+def write_task_manifest(task_path: str, output_files: List[str]) -> None:
+    """
+    Record the mtime and size of the generated files so reruns can skip the task.
+    The manifest is replaced (temporary file and os.replace) rather than rewritten in place,
+    so a manifest still hardlinked to the one in a cloned template is left alone.
+    """
+    task_dir = Path(task_path)
+    manifest_path = task_dir / MANIFEST_FILENAME
+    outputs: Dict[str, List[int]] = {}
+    tmp_path = None
+
+    try:
+        for name in output_files:
+            st = os.stat(task_dir / name)
+            outputs[name] = [st.st_mtime_ns, st.st_size]
+
+        fd, tmp_path = tempfile.mkstemp(dir=task_dir, prefix=f"{MANIFEST_FILENAME}.", suffix=".tmp")
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump({"outputs": outputs}, f)
+        # mkstemp creates the file 0600; keep the old manifest's mode, or the usual 0644
+        try:
+            shutil.copymode(manifest_path, tmp_path)
+        except OSError:
+            os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, manifest_path)
+        tmp_path = None
+    except Exception:
+        pass
+    finally:
+        if tmp_path is not None:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+
+
+def is_task_manifest_current(task_path: str) -> bool:
+    """Check whether the task manifest exists and all recorded outputs are unchanged."""
+    task_dir = Path(task_path)
+
+    try:
+        with open(task_dir / MANIFEST_FILENAME, 'r', encoding='utf-8') as f:
+            outputs = json.load(f).get("outputs") or {}
+    except Exception:
+        return False
+
+    if not outputs:
+        return False
+
+    try:
+        for name, (mtime_ns, size) in outputs.items():
+            st = os.stat(task_dir / name)
+            if st.st_mtime_ns != mtime_ns or st.st_size != size:
+                return False
+    except Exception:
+        return False
+
+    return True
@@ -51,11 +51,14 @@ from forge.ctf_forge import (
     detect_custom_interpreter_paths,
     generate_interpreter_fix_commands,
     detect_problematic_shebangs,
+    apply_shebang_fixes_locally,
     generate_shebang_fix_command,
     detect_python_files,
     detect_node_files,
+    scan_task_files,
     get_category_specific_guidelines,
     get_enhanced_file_analysis,
+    get_ubuntu_version_from_base_image,
     generate_adaptive_docker_setup,
     generate_fallback_dockerfile,
 )
@@ -111,14 +114,14 @@ def call_model_for_dockerfile(task_data: Dict, available_files: List[str], has_s
     binary_files = relevant_binary_files
     
     # Test library configurations to get detailed analysis
-    test_results = {}
+    test_results = None
     if provided_libs and binary_files:
         test_results = test_binary_library_configurations(task_path, binary_files, provided_libs, verbose)
     
     # Generate library fix commands based on test results
-    if test_results and test_results.get("working_config") != "system_libs":
-        library_fix_commands = test_results.get("commands", [])
-        if test_results.get("working_config") == "unknown":
+    if test_results is not None and test_results.working_config != "system_libs":
+        library_fix_commands = test_results.commands
+        if test_results.working_config == "unknown":
             # Fallback to heuristic approach
             library_fix_commands = generate_library_fix_commands(provided_libs, binary_files, task_path, verbose)
     else:
@@ -137,17 +140,17 @@ def call_model_for_dockerfile(task_data: Dict, available_files: List[str], has_s
 - **PROVIDED LIBRARIES**: {provided_libs}"""
         
         # Add test results information if available
-        if test_results:
+        if test_results is not None:
             library_instructions += f"""
-- **COMPATIBILITY ANALYSIS**: {test_results.get('reason', 'Unknown')}"""
+- **COMPATIBILITY ANALYSIS**: {test_results.reason}"""
             
-            if test_results.get("detected_issues"):
+            if test_results.detected_issues:
                 library_instructions += f"""
-- **DETECTED ISSUES**: {'; '.join(test_results['detected_issues'])}"""
+- **DETECTED ISSUES**: {'; '.join(test_results.detected_issues)}"""
             
-            if test_results.get("recommended_base_image") != "ubuntu:20.04":
+            if test_results.recommended_base_image != "ubuntu:20.04":
                 library_instructions += f"""
-- **RECOMMENDED BASE IMAGE**: {test_results['recommended_base_image']} (for better compatibility)"""
+- **RECOMMENDED BASE IMAGE**: {test_results.recommended_base_image} (for better compatibility)"""
         
         library_instructions += f"""
 - For binaries with provided libraries, the following approach MUST be used:
@@ -198,8 +201,10 @@ Note that the challenge should be hosted on a server inside the docker container
 - Focus on challenge-specific setup only, not system package installation"""
     
     # Update comprehensive Docker setup block to use dynamic base image
-    has_python_files = detect_python_files(task_path, available_files)
-    has_node_files = detect_node_files(task_path, available_files)
+    # One pass over the task files for the language checks and the shebang fixes further down
+    task_file_scan = scan_task_files(task_path, available_files)
+    has_python_files = task_file_scan["has_python_files"]
+    has_node_files = task_file_scan["has_node_files"]
     comprehensive_setup = generate_adaptive_docker_setup(base_image, architecture, has_python_files, has_node_files)
     
     prompt = DOCKERFILE_GENERATION_PROMPT.format(
@@ -216,15 +221,15 @@ Note that the challenge should be hosted on a server inside the docker container
     )
     
     # Add library compatibility information to the prompt
-    if test_results and test_results.get("detected_issues"):
+    if test_results is not None and test_results.detected_issues:
         prompt += f"""
 
 # LIBRARY COMPATIBILITY ANALYSIS:
 The following compatibility issues were detected during library testing:
-{chr(10).join(f"- {issue}" for issue in test_results['detected_issues'])}
+{chr(10).join(f"- {issue}" for issue in test_results.detected_issues)}
 
-Working configuration: {test_results.get('working_config', 'unknown')}
-Recommended base image: {test_results.get('recommended_base_image', base_image)}
+Working configuration: {test_results.working_config}
+Recommended base image: {test_results.recommended_base_image}
 
 CRITICAL: Use the recommended base image and patchelf commands to ensure proper library compatibility."""
     
@@ -339,11 +344,17 @@ CRITICAL: Use the recommended base image and patchelf commands to ensure proper
                             print(f"{YELLOW}Could not find appropriate location to add interpreter fixes{RESET}")
                 
                 # After injecting interpreter fixes, detect and fix problematic shebangs
-                problematic_shebangs = detect_problematic_shebangs(task_path, available_files)
+                problematic_shebangs = task_file_scan["problematic_shebangs"]
                 if problematic_shebangs and verbose:
                     print(f"{YELLOW}Detected problematic shebangs: {problematic_shebangs}{RESET}")
                 
-                shebang_fix_command = generate_shebang_fix_command(problematic_shebangs)
+                # Fix what we can in the task files themselves (picked up by COPY); sed only handles the rest
+                fixed_shebang_files = apply_shebang_fixes_locally(task_path, problematic_shebangs)
+                if fixed_shebang_files and verbose:
+                    print(f"{GREEN}Fixed shebangs in task files: {fixed_shebang_files}{RESET}")
+                shebang_fix_command = generate_shebang_fix_command(
+                    [entry for entry in problematic_shebangs if entry[0] not in fixed_shebang_files]
+                )
                 if shebang_fix_command:
                     # Find the last COPY command and add the shebang fix after it
                     lines = dockerfile_content.split('\n')
@@ -502,7 +513,7 @@ def call_model_for_dockerfile_with_fallback(task_data: Dict, available_files: Li
             # Run library compatibility tests
             test_results = test_binary_library_configurations(task_path, binary_files, provided_libs, verbose)
             
-            if test_results.get("working_config") == "unknown":
+            if test_results.working_config == "unknown":
                 if verbose:
                     print(f"{YELLOW}Library tests failed, generating fallback Dockerfile...{RESET}")
                 
@@ -556,21 +567,6 @@ CMD ["socat", "TCP-LISTEN:1337,reuseaddr,fork", "EXEC:/challenge/run.sh,stderr"]
     
     return minimal_dockerfile, parsed_flag
 
-def get_ubuntu_version_from_base_image(base_image: str) -> str:
-    """
-    Extract Ubuntu version from base image string.
-    Returns version like "16.04", "18.04", "20.04", etc.
-    """
-    import re
-    
-    # Extract version from strings like "ubuntu:20.04", "ubuntu:16.04"
-    match = re.search(r'ubuntu:(\d+\.\d+)', base_image.lower())
-    if match:
-        return match.group(1)
-    
-    # Default to 20.04 if no version found
-    return "20.04"
-
 def get_adaptive_package_lists(ubuntu_version: str, architecture: str = "64") -> Dict[str, List[str]]:
     """
     Get package lists adapted for specific Ubuntu versions and architecture.
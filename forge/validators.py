@@ -5,6 +5,9 @@
 from __future__ import annotations
 from typing import List, Tuple
 import fnmatch
+import os
+import shutil
+import tempfile
 
 
 def fix_dockerfile_trailing_backslashes(dockerfile_content: str) -> tuple[str, List[str]]:
@@ -298,15 +301,23 @@ def check_dockerfile_file_existence(dockerfile_content: str, available_files: Li
 def fix_dockerfile_in_place(dockerfile_path: str, verbose: bool = False) -> bool:
     """
     Fix trailing backslash issues in an existing Dockerfile.
+    The fixed file replaces the old one (temporary file and os.replace, keeping its mode)
+    rather than being written in place, so files hardlinked to it are left alone.
     Returns True if fixes were made, False otherwise.
     """
+    tmp_path = None
     try:
         with open(dockerfile_path, 'r') as f:
             original_content = f.read()
         fixed_content, fixes_made = fix_dockerfile_trailing_backslashes(original_content)
         if fixes_made:
-            with open(dockerfile_path, 'w') as f:
+            dockerfile_dir, dockerfile_name = os.path.split(os.path.abspath(dockerfile_path))
+            fd, tmp_path = tempfile.mkstemp(dir=dockerfile_dir, prefix=f".{dockerfile_name}.", suffix=".tmp")
+            with os.fdopen(fd, 'w') as f:
                 f.write(fixed_content)
+            shutil.copymode(dockerfile_path, tmp_path)
+            os.replace(tmp_path, dockerfile_path)
+            tmp_path = None
             if verbose:
                 print(f"Fixed {len(fixes_made)} trailing backslash issues in {dockerfile_path}:")
                 for fix in fixes_made:
@@ -320,3 +331,9 @@ def fix_dockerfile_in_place(dockerfile_path: str, verbose: bool = False) -> bool
         if verbose:
             print(f"Error fixing Dockerfile {dockerfile_path}: {e}")
         return False
+    finally:
+        if tmp_path is not None:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
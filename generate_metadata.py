@@ -11,13 +11,15 @@ import argparse
 from pathlib import Path
 import multiprocessing as mp
 
-def has_sha256_file(directory):
-    """Check if directory contains any of the expected SHA256 files."""
+# Where a task keeps its flag hash
+SHA256_FILE_NAMES = ('flag.sha256', '.flag.sha256', 'flag.sha256.txt')
+
+def has_sha256_file(directory, files=None):
+    """Check if directory contains any of the expected SHA256 files (files: its entry names, if already listed)."""
     try:
-        files = os.listdir(directory)
-        sha256_files = ['flag.sha256', '.flag.sha256', 'flag.sha256.txt']
-        
-        return any(sha256_file in files for sha256_file in sha256_files)
+        if files is None:
+            files = os.listdir(directory)
+        return any(sha256_file in files for sha256_file in SHA256_FILE_NAMES)
         
     except (OSError, PermissionError):
         return False
@@ -46,10 +48,12 @@ def has_compose_true(directory):
     except (OSError, PermissionError, json.JSONDecodeError):
         return False
 
-def has_required_files(directory, require_sha256=False, skip_sha256=False, skip_flagcheck=False, require_compose=False):
-    """Check if directory contains both REHOST.md and DESCRIPTION.md files, and optionally filter based on SHA256, flagcheck, and compose files."""
+def has_required_files(directory, require_sha256=False, skip_sha256=False, skip_flagcheck=False, require_compose=False, files=None):
+    """Check if directory contains both REHOST.md and DESCRIPTION.md files, and optionally filter based on SHA256, flagcheck, and compose files.
+    files: the directory's entry names, when the caller already listed it."""
     try:
-        files = os.listdir(directory)
+        if files is None:
+            files = os.listdir(directory)
         
         # Check for both REHOST.md and DESCRIPTION.md (exact match)
         has_rehost = 'REHOST.md' in files
@@ -67,9 +71,9 @@ def has_required_files(directory, require_sha256=False, skip_sha256=False, skip_
             return False
             
         if require_sha256:
-            return basic_requirements and has_sha256_file(directory)
+            return basic_requirements and has_sha256_file(directory, files)
         elif skip_sha256:
-            return basic_requirements and not has_sha256_file(directory)
+            return basic_requirements and not has_sha256_file(directory, files)
         else:
             return basic_requirements
         
@@ -87,31 +91,39 @@ def read_challenge_info(challenge_path):
 
 def check_directory_files(args_tuple):
     """Helper function for multiprocessing - returns tuple of (directory, has_files)."""
-    directory, require_sha256, skip_sha256, skip_flagcheck, require_compose = args_tuple
-    return directory, has_required_files(directory, require_sha256, skip_sha256, skip_flagcheck, require_compose)
+    directory, require_sha256, skip_sha256, skip_flagcheck, require_compose, files = args_tuple
+    return directory, has_required_files(directory, require_sha256, skip_sha256, skip_flagcheck, require_compose, files)
+
+def walk_directories(base_dir):
+    """Yield (directory, entry names) for every directory below base_dir, skipping hidden ones.
+    One scandir per directory; symlinked directories are not followed, as with os.walk."""
+    stack = [base_dir]
+    while stack:
+        directory = stack.pop()
+        try:
+            with os.scandir(directory) as entries:
+                names = set()
+                subdirs = []
+                for entry in entries:
+                    names.add(entry.name)
+                    # Skip hidden directories (those starting with a dot)
+                    if not entry.name.startswith('.') and entry.is_dir(follow_symlinks=False):
+                        subdirs.append(entry.path)
+        except OSError:
+            continue
+        
+        if directory != base_dir:
+            yield directory, names
+        stack.extend(reversed(subdirs))
 
 def find_task_directories(base_dir, require_sha256=False, skip_sha256=False, skip_flagcheck=False, require_compose=False, num_workers=32):
     """Find all task directories that contain required files using parallel processing."""
     task_dirs_with_files = []
     task_dirs_without_files = []
-    all_directories = []
     
-    # Collect all directories first
-    for root, dirs, files in os.walk(base_dir):
-        # Skip the base directory itself and only check subdirectories
-        if root == base_dir:
-            continue
-            
-        # Skip hidden directories (those starting with a dot)
-        path_parts = Path(root).parts
-        skip_directory = False
-        for part in path_parts:
-            if part.startswith('.'):
-                skip_directory = True
-                break
-        
-        if not skip_directory:
-            all_directories.append(root)
+    # Collect all directories and their entry names in one pass
+    listings = dict(walk_directories(base_dir))
+    all_directories = list(listings)
     
     total_dirs = len(all_directories)
     filter_msg = ""
@@ -126,11 +138,26 @@ def find_task_directories(base_dir, require_sha256=False, skip_sha256=False, ski
     
     print(f"Processing {total_dirs} directories with {num_workers} workers{filter_msg} (skipping hidden directories)...")
     
-    # Process directories in parallel
-    # Pass both directory and filtering flags to each worker
-    args_list = [(directory, require_sha256, skip_sha256, skip_flagcheck, require_compose) for directory in all_directories]
-    with mp.Pool(num_workers) as pool:
-        results = pool.map(check_directory_files, args_list)
+    # REHOST.md and DESCRIPTION.md are checked against the names from the walk; only the
+    # directories that have both go through the filters, which need more file access
+    candidates = []
+    results = []
+    for directory, names in listings.items():
+        if 'REHOST.md' in names and 'DESCRIPTION.md' in names:
+            candidates.append(directory)
+        else:
+            results.append((directory, False))
+    
+    if skip_flagcheck or require_compose:
+        # Process the filters in parallel
+        # Pass the directory, its entry names and the filtering flags to each worker
+        args_list = [(directory, require_sha256, skip_sha256, skip_flagcheck, require_compose, listings[directory])
+                     for directory in candidates]
+        with mp.Pool(num_workers) as pool:
+            results += pool.map(check_directory_files, args_list)
+    else:
+        results += [check_directory_files((directory, require_sha256, skip_sha256, skip_flagcheck, require_compose, listings[directory]))
+                    for directory in candidates]
     
     # Separate directories with and without required files
     for directory, has_files in results: